@@ -1,3 +1,5 @@
+import functools
+
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -6,79 +8,126 @@ import streamlit as st
 
 from datetime import datetime, timedelta
 
+from baseline import (
+    MONTH_TO_SEASON,
+    baseline_table,
+    build_baseline,
+    is_abnormal,
+    parse_baseline,
+)
+from changepoints import detect_all
+from correlation import anomaly_matrix, correlation_matrix
+from figcache import FigureCache, dataset_hash
+from ingest import is_subdaily, load_temperature_data, resample_daily
+
 
 st.title("Анализ температурных данных и мониторинг текущей температуры через OpenWeatherMap API")  # noqa: E501
 
 st.header("Шаг 1: Загрузка данных")
 
-uploaded_file = st.file_uploader("Выберите CSV-файл", type=["csv"])
+uploaded_file = st.file_uploader(
+    "Выберите CSV-файл или архив с CSV (zip/tar, члены .gz/.zst)",
+    type=["csv", "gz", "zst", "zip", "tar", "tgz"],
+)
+
+
+@st.cache_data
+def get_data(name, payload):
+    raw_data = load_temperature_data(name, payload)
+    if is_subdaily(raw_data):
+        return resample_daily(raw_data), raw_data
+    return raw_data, None
+
 
 if uploaded_file is not None:
-    data = pd.read_csv(uploaded_file)
+    data, raw_data = get_data(uploaded_file.name, uploaded_file.getvalue())
+    if raw_data is not None:
+        st.write(
+            f"Обнаружены подсуточные данные ({len(raw_data)} строк), "
+            "анализ ведется по дневным mean/min/max"
+        )
     st.write("Превью данных:")
     st.dataframe(data)
 else:
     st.write("Пожалуйста, загрузите CSV-файл")
 
-st.header("Шаг 2: Выбор города")
+baseline_file = st.file_uploader(
+    "Предрасчитанный сезонный baseline (необязательно)", type=["json"]
+)
 
-cities = [
-    'New York',
-    'London',
-    'Paris',
-    'Tokyo',
-    'Moscow',
-    'Sydney',
-    'Berlin',
-    'Beijing',
-    'Rio de Janeiro',
-    'Dubai',
-    'Los Angeles',
-    'Singapore',
-    'Mumbai',
-    'Cairo',
-    'Mexico City',
-]
 
-selected_city = st.selectbox('Выберите город', cities)
+@st.cache_data
+def get_baseline(data, baseline_bytes):
+    if baseline_bytes is not None:
+        return baseline_table(parse_baseline(baseline_bytes))
+    return baseline_table(build_baseline([data]))
 
-st.header("Шаг 3: Ввод API ключа")
 
-api_key = st.text_input('Введите ваш API-ключ', type='password')
+if uploaded_file is not None or baseline_file is not None:
+    df_baseline = get_baseline(
+        data if uploaded_file is not None else None,
+        baseline_file.getvalue() if baseline_file is not None else None,
+    )
+else:
+    df_baseline = None
 
 
-def is_correct_api_key(api_key):
-    url = f'https://api.openweathermap.org/data/2.5/weather?q={selected_city}&appid={api_key}'  # noqa: E501
-    response = requests.get(url=url)
-    return response.status_code == 200
+ROLLING_WINDOW = '30d'
 
 
-if uploaded_file is not None and api_key is not None:
-    if is_correct_api_key(api_key):
-        st.success('API-ключ корректный.')
-    else:
-        st.error('Некорректный API-ключ. Пожалуйста, попробуйте снова')
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache()
 
-st.header("Шаг 4: Анализ данных")
 
-if uploaded_file is not None and data is not None:
-    df_city = data.loc[data['city'] == selected_city]
-    df_city.loc[:, 'timestamp'] = pd.to_datetime(df_city.timestamp)
-    df_city.set_index('timestamp', inplace=True)
+@st.cache_data
+def get_correlation(data):
+    return correlation_matrix(anomaly_matrix(data))
 
-    df_season_mean = df_city.groupby('season').temperature.mean().to_frame()
-    df_season_std = df_city.groupby('season').temperature.std().to_frame()
 
-    df_description = df_season_mean.join(df_season_std, lsuffix='_mean', rsuffix='_std')  # noqa: E501
-    st.dataframe(df_description)
+@st.cache_data
+def get_changepoints(data):
+    return detect_all(data)
+
+
+def add_changepoints(fig, changepoints):
+    for row in changepoints.itertuples():
+        fig.add_vline(x=row.timestamp, line_dash='dot', line_color='black')
+        fig.add_annotation(
+            x=row.timestamp,
+            y=1,
+            yref='paper',
+            text=f'сдвиг {row.shift:+.1f}°C',
+            showarrow=False,
+        )
+
 
-    df_city['rolling_mean'] = df_city['temperature'].rolling(window='30d').mean()  # noqa: E501
-    df_city['rolling_std'] = df_city['temperature'].rolling(window='30d').std()
+def prepare_city_frame(df_city):
+    df_city = df_city.copy()
+    df_city['rolling_mean'] = df_city['temperature'].rolling(window=ROLLING_WINDOW).mean()  # noqa: E501
+    df_city['rolling_std'] = df_city['temperature'].rolling(window=ROLLING_WINDOW).std()  # noqa: E501
 
     df_city['upper'] = df_city['rolling_mean'] + df_city['rolling_std']
     df_city['lower'] = df_city['rolling_mean'] - df_city['rolling_std']
-    df_city.reset_index(inplace=True)
 
+    df_city['double_upper'] = df_city['rolling_mean'] + df_city['rolling_std'].mul(2)  # noqa: E501
+    df_city['double_lower'] = df_city['rolling_mean'] - df_city['rolling_std'].mul(2)  # noqa: E501
+    df_city['is_outlier'] = (df_city.temperature > df_city.double_upper) | (df_city.temperature < df_city.double_lower)  # noqa: E501
+
+    return df_city.reset_index()
+
+
+def build_correlation_figure(correlation):
+    return px.imshow(
+        correlation,
+        zmin=-1,
+        zmax=1,
+        color_continuous_scale='RdBu_r',
+        title='Корреляция температурных аномалий между городами',
+    )
+
+
+def build_rolling_figure(df_city, changepoints):
     fig = px.scatter(
         df_city,
         x='timestamp',
@@ -109,12 +158,11 @@ if uploaded_file is not None and data is not None:
         )
     )
 
-    st.plotly_chart(fig)
+    add_changepoints(fig, changepoints)
+    return fig
 
-    df_city['double_upper'] = df_city['rolling_mean'] + df_city['rolling_std'].mul(2)  # noqa: E501
-    df_city['double_lower'] = df_city['rolling_mean'] - df_city['rolling_std'].mul(2)  # noqa: E501
-    df_city['is_outlier'] = (df_city.temperature > df_city.double_upper) | (df_city.temperature < df_city.double_lower)  # noqa: E501
 
+def build_outlier_figure(df_city, changepoints):
     inside = df_city[~df_city.is_outlier]
     outside = df_city[df_city.is_outlier]
 
@@ -169,83 +217,229 @@ if uploaded_file is not None and data is not None:
         yaxis_title='Температура (°C)'
     )
 
-    st.plotly_chart(fig)
+    add_changepoints(fig, changepoints)
+    return fig
 
-    for season in df_city['season'].unique():
-        season_data = df_city[df_city['season'] == season].copy()
-        season_data['year'] = season_data['timestamp'].dt.year
 
-        fig = go.Figure()
+def build_season_figure(df_city, season, df_percentiles):
+    season_data = df_city[df_city['season'] == season].copy()
+    season_data['year'] = season_data['timestamp'].dt.year
+
+    fig = go.Figure()
+
+    fig.add_trace(
+        go.Scatter(
+            x=season_data['timestamp'],
+            y=season_data['temperature'],
+            mode='markers',
+            name='Temperature Points'
+        )
+    )
+
+    shift_amount = {
+        'winter': 0,
+        'spring': 30,
+        'summer': 60,
+        'autumn': 120
+    }[season]
+
+    for year in season_data['year'].unique():
+        yearly_data = season_data[season_data['year'] == year]
+
+        shift_date = yearly_data['timestamp'].min() + timedelta(days=shift_amount)  # noqa: E501
 
         fig.add_trace(
-            go.Scatter(
-                x=season_data['timestamp'],
-                y=season_data['temperature'],
-                mode='markers',
-                name='Temperature Points'
+            go.Box(
+                y=yearly_data['temperature'],
+                x=[shift_date] * len(yearly_data),
+                name=f'{year} Box',
+                boxpoints=False
             )
         )
 
-        shift_amount = {
-            'winter': 0,
-            'spring': 30,
-            'summer': 60,
-            'autumn': 120
-        }[season]
-
-        for year in season_data['year'].unique():
-            yearly_data = season_data[season_data['year'] == year]
-
-            shift_date = yearly_data['timestamp'].min() + timedelta(days=shift_amount)  # noqa: E501
-
-            fig.add_trace(
-                go.Box(
-                    y=yearly_data['temperature'],
-                    x=[shift_date] * len(yearly_data),
-                    name=f'{year} Box',
-                    boxpoints=False
-                )
-            )
+    if season in df_percentiles.index:
+        fig.add_hrect(
+            y0=df_percentiles.loc[season, 'temperature_p5'],
+            y1=df_percentiles.loc[season, 'temperature_p95'],
+            fillcolor='rgba(0, 128, 0, 0.1)',
+            line_width=0,
+            annotation_text='p5 — p95',
+        )
+        fig.add_hline(
+            y=df_percentiles.loc[season, 'temperature_p50'],
+            line_dash='dash',
+            line_color='green',
+        )
+
+    fig.update_layout(
+        title=f'Temperature Data for {season.capitalize()}',
+        xaxis_title='Дата',
+        yaxis_title='Температура (°C)',
+        template='plotly_white'
+    )
+
+    return fig
 
-        fig.update_layout(
-            title=f'Temperature Data for {season.capitalize()}',
-            xaxis_title='Дата',
-            yaxis_title='Температура (°C)',
-            template='plotly_white'
+
+def build_raw_figure(raw_city, start, end):
+    raw_window = raw_city[
+        raw_city.timestamp.between(
+            pd.Timestamp(start),
+            pd.Timestamp(end) + timedelta(days=1),
+            inclusive='left',
         )
+    ]
+    return px.line(
+        raw_window,
+        x='timestamp',
+        y='temperature',
+        title='Исходные подсуточные измерения',
+        labels={'timestamp': 'Дата', 'temperature': 'Температура (°C)'},
+    )
 
-        st.plotly_chart(fig)
 
-st.header('Шаг 5: Текущая температура')
+st.header("Шаг 2: Выбор города")
+
+cities = [
+    'New York',
+    'London',
+    'Paris',
+    'Tokyo',
+    'Moscow',
+    'Sydney',
+    'Berlin',
+    'Beijing',
+    'Rio de Janeiro',
+    'Dubai',
+    'Los Angeles',
+    'Singapore',
+    'Mumbai',
+    'Cairo',
+    'Mexico City',
+]
+
+selected_city = st.selectbox('Выберите город', cities)
+
+st.header("Шаг 3: Ввод API ключа")
+
+api_key = st.text_input('Введите ваш API-ключ', type='password')
+
+
+def is_correct_api_key(api_key):
+    url = f'https://api.openweathermap.org/data/2.5/weather?q={selected_city}&appid={api_key}'  # noqa: E501
+    response = requests.get(url=url)
+    return response.status_code == 200
+
+
+if uploaded_file is not None and api_key is not None:
+    if is_correct_api_key(api_key):
+        st.success('API-ключ корректный.')
+    else:
+        st.error('Некорректный API-ключ. Пожалуйста, попробуйте снова')
+
+st.header("Шаг 4: Анализ данных")
 
-if api_key is not None and is_correct_api_key(api_key):
-    df_mean = data.groupby(['city', 'season']).temperature.mean().to_frame()
-    df_std = data.groupby(['city', 'season']).temperature.std().to_frame()
+if uploaded_file is not None and data is not None:
+    df_city = data.loc[data['city'] == selected_city]
+    df_city.loc[:, 'timestamp'] = pd.to_datetime(df_city.timestamp)
+    df_city.set_index('timestamp', inplace=True)
+
+    df_season_mean = df_city.groupby('season', observed=True).temperature.mean().to_frame()  # noqa: E501
+    df_season_std = df_city.groupby('season', observed=True).temperature.std().to_frame()  # noqa: E501
 
-    df_mean_std = df_mean.join(df_std, lsuffix='_mean', rsuffix='_std').reset_index()  # noqa: E501
+    df_description = df_season_mean.join(df_season_std, lsuffix='_mean', rsuffix='_std')  # noqa: E501
+    df_percentiles = df_baseline.loc[
+        df_baseline.city.eq(selected_city),
+        ['season', 'temperature_p5', 'temperature_p50', 'temperature_p95'],
+    ].set_index('season')
+    df_description = df_description.join(df_percentiles)
+    st.dataframe(df_description)
 
-    month_to_season = {
-        12: "winter", 1: "winter", 2: "winter",
-        3: "spring", 4: "spring", 5: "spring",
-        6: "summer", 7: "summer", 8: "summer",
-        9: "autumn", 10: "autumn", 11: "autumn",
-    }
+    missing_seasons = sorted(set(df_city['season']) - set(df_percentiles.index))  # noqa: E501
+    if missing_seasons:
+        st.warning(
+            f'В baseline нет данных для {selected_city} '
+            f'({", ".join(missing_seasons)}): перцентили не показаны'
+        )
+
+    df_changepoints = get_changepoints(data)
+    city_changepoints = df_changepoints[df_changepoints.city == selected_city]
+    st.write("Точки смены режима (все города):")
+    st.dataframe(df_changepoints)
+
+    dataset_key = dataset_hash(
+        uploaded_file.getvalue(),
+        baseline_file.getvalue() if baseline_file is not None else None,
+    )
+
+    def show_figure(mode, build, city=selected_city, window=ROLLING_WINDOW):
+        key = (dataset_key, city, window, mode)
+        st.plotly_chart(get_figure_cache().get_or_build(key, build))
+
+    @functools.cache
+    def get_city_frame():
+        return prepare_city_frame(df_city)
+
+    show_figure(
+        'correlation',
+        lambda: build_correlation_figure(get_correlation(data)),
+        city=None,
+    )
+    show_figure(
+        'rolling',
+        lambda: build_rolling_figure(get_city_frame(), city_changepoints),
+    )
+    show_figure(
+        'outliers',
+        lambda: build_outlier_figure(get_city_frame(), city_changepoints),
+    )
+
+    for season in df_city['season'].unique():
+        show_figure(
+            f'season:{season}',
+            lambda: build_season_figure(get_city_frame(), season, df_percentiles),  # noqa: E501
+        )
+
+    if raw_data is not None:
+        raw_city = raw_data[raw_data.city == selected_city]
+        last_day = raw_city.timestamp.max().date()
+        window = st.date_input(
+            'Окно для просмотра исходных измерений',
+            value=(last_day - timedelta(days=7), last_day),
+            min_value=raw_city.timestamp.min().date(),
+            max_value=last_day,
+        )
+
+        if len(window) == 2:
+            show_figure(
+                'raw',
+                lambda: build_raw_figure(raw_city, *window),
+                window=tuple(window),
+            )
+
+st.header('Шаг 5: Текущая температура')
+
+if df_baseline is not None and api_key is not None and is_correct_api_key(api_key):  # noqa: E501
+    df_mean_std = df_baseline
 
     url = f'https://api.openweathermap.org/data/2.5/weather?q={selected_city}&appid={api_key}&units=metric'  # noqa: E501
     response = requests.get(url=url).json()
     temperature = response['main']['temp']
 
+    season = MONTH_TO_SEASON[datetime.today().month]
     historical_data = df_mean_std.loc[
-        df_mean_std.city.eq(selected_city)
-        & df_mean_std.season.eq(month_to_season[datetime.today().month])
-    ].to_dict(orient='index').values()
-    historical_data = list(historical_data)[0]
-
-    upper = historical_data['temperature_mean'] + 2 * historical_data['temperature_std']  # noqa: E501
-    lower = historical_data['temperature_mean'] - 2 * historical_data['temperature_std']  # noqa: E501
+        df_mean_std.city.eq(selected_city) & df_mean_std.season.eq(season)
+    ].to_dict(orient='records')
 
     st.write(f'Текущая температура: {round(temperature, 2)}°C')
-    st.write(f'Диапазон допустимой температуры: {round(lower, 2)}°C --- {round(upper, 2)}°C')  # noqa: E501
-    st.write('Температура в пределах нормы' if lower <= temperature <= upper else 'Температура вне нормы')  # noqa: E501
-    st.write(f'Средняя температура за период: {round(historical_data["temperature_mean"], 2)}°C')  # noqa: E501
-    st.write(f'Стандартное отклонение: {round(historical_data["temperature_std"], 2)}°C')  # noqa: E501
+    if not historical_data:
+        st.warning(f'В baseline нет данных для {selected_city} ({season})')
+    else:
+        historical_data = historical_data[0]
+        p5 = historical_data['temperature_p5']
+        p95 = historical_data['temperature_p95']
+
+        st.write(f'Средняя температура за период: {round(historical_data["temperature_mean"], 2)}°C')  # noqa: E501
+        st.write(f'Стандартное отклонение: {round(historical_data["temperature_std"], 2)}°C')  # noqa: E501
+        st.write(f'Перцентили p5 / p50 / p95: {round(p5, 2)}°C / {round(historical_data["temperature_p50"], 2)}°C / {round(p95, 2)}°C')  # noqa: E501
+        st.write('Аномальная температура: вне диапазона p5 — p95' if is_abnormal(temperature, p5, p95) else 'Температура в пределах p5 — p95')  # noqa: E501
@@ -0,0 +1,264 @@
+import argparse
+import json
+import math
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+CHUNK_SIZE = 100_000
+PERCENTILES = (0.05, 0.5, 0.95)
+
+MONTH_TO_SEASON = {
+    12: "winter", 1: "winter", 2: "winter",
+    3: "spring", 4: "spring", 5: "spring",
+    6: "summer", 7: "summer", 8: "summer",
+    9: "autumn", 10: "autumn", 11: "autumn",
+}
+
+
+def is_abnormal(temperature, p5, p95):
+    """Аномалия — температура вне диапазона p5 — p95 сезона"""
+    return not p5 <= temperature <= p95
+
+
+class KLLSketch:
+    """
+    Сливаемый скетч квантилей в стиле KLL: память O(k log n),
+    ошибка ранга порядка 1/k
+    """
+
+    def __init__(self, k=200, levels=None, count=0):
+        self.k = k
+        self.levels = levels or [np.empty(0)]
+        self.count = count
+        self._rng = np.random.default_rng()
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                odd = len(items) % 2
+                offset = self._rng.integers(2)
+                self.levels[level + 1] = np.concatenate(
+                    [self.levels[level + 1], items[odd:][offset::2]]
+                )
+                self.levels[level] = items[:odd]
+            level += 1
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += len(values)
+        self._compress()
+        return self
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        values = np.concatenate(self.levels)
+        if not len(values):
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        weights = np.concatenate([
+            np.full(len(items), 2 ** level, dtype=float)
+            for level, items in enumerate(self.levels)
+        ])
+        order = np.argsort(values)
+        ranks = np.cumsum(weights[order])
+        index = np.searchsorted(ranks, np.asarray(q) * ranks[-1])
+        return values[order][np.minimum(index, len(values) - 1)]
+
+    def to_dict(self):
+        return {
+            'k': self.k,
+            'count': self.count,
+            'levels': [items.tolist() for items in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, payload):
+        return cls(
+            k=payload['k'],
+            levels=[np.asarray(items, dtype=float) for items in payload['levels']],  # noqa: E501
+            count=payload['count'],
+        )
+
+
+class SeasonStats:
+    """
+    Потоковые статистики температуры для пары (город, сезон):
+    среднее и дисперсия по Чану плюс скетч квантилей
+    """
+
+    def __init__(self, count=0, mean=0.0, m2=0.0, sketch=None):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.sketch = sketch or KLLSketch()
+
+    def _combine(self, count, mean, m2):
+        total = self.count + count
+        if not total:
+            return
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            mean = values.mean()
+            self._combine(len(values), mean, ((values - mean) ** 2).sum())
+            self.sketch.update(values)
+        return self
+
+    def merge(self, other):
+        self._combine(other.count, other.mean, other.m2)
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan  # noqa: E501
+
+    def percentiles(self, q=PERCENTILES):
+        return dict(zip(q, self.sketch.quantile(q)))
+
+    def is_abnormal(self, temperature, lower=PERCENTILES[0], upper=PERCENTILES[-1]):  # noqa: E501
+        return is_abnormal(temperature, *self.sketch.quantile([lower, upper]))
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'm2': self.m2,
+            'sketch': self.sketch.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, payload):
+        return cls(
+            count=payload['count'],
+            mean=payload['mean'],
+            m2=payload['m2'],
+            sketch=KLLSketch.from_dict(payload['sketch']),
+        )
+
+
+def update_baseline(baseline, chunk):
+    for (city, season), temperature in chunk.groupby(['city', 'season'], observed=True).temperature:  # noqa: E501
+        baseline.setdefault((city, season), SeasonStats()).update(temperature.to_numpy())  # noqa: E501
+    return baseline
+
+
+def build_baseline(chunks):
+    """Построение baseline по потоку чанков DataFrame"""
+    baseline = {}
+    for chunk in chunks:
+        update_baseline(baseline, chunk)
+    return baseline
+
+
+def baseline_from_csv(path, chunksize=CHUNK_SIZE):
+    chunks = pd.read_csv(
+        path,
+        usecols=['city', 'season', 'temperature'],
+        chunksize=chunksize,
+    )
+    return build_baseline(chunks)
+
+
+def merge_baselines(baselines):
+    merged = {}
+    for baseline in baselines:
+        for key, stats in baseline.items():
+            if key in merged:
+                merged[key].merge(stats)
+            else:
+                merged[key] = stats
+    return merged
+
+
+def build_baseline_parallel(paths, max_workers=None, chunksize=CHUNK_SIZE):
+    """Параллельное построение baseline: по процессу на файл, затем слияние"""
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        baselines = executor.map(
+            baseline_from_csv, paths, [chunksize] * len(paths)
+        )
+        return merge_baselines(baselines)
+
+
+def baseline_table(baseline):
+    rows = []
+    for (city, season), stats in baseline.items():
+        p5, p50, p95 = stats.sketch.quantile(PERCENTILES)
+        rows.append({
+            'city': city,
+            'season': season,
+            'temperature_mean': stats.mean,
+            'temperature_std': stats.std,
+            'temperature_p5': p5,
+            'temperature_p50': p50,
+            'temperature_p95': p95,
+            'count': stats.count,
+        })
+    return pd.DataFrame(rows)
+
+
+def dump_baseline(baseline):
+    return json.dumps([
+        {'city': city, 'season': season, **stats.to_dict()}
+        for (city, season), stats in baseline.items()
+    ])
+
+
+def parse_baseline(payload):
+    return {
+        (row['city'], row['season']): SeasonStats.from_dict(row)
+        for row in json.loads(payload)
+    }
+
+
+def save_baseline(baseline, path):
+    with open(path, 'w') as f:
+        f.write(dump_baseline(baseline))
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return parse_baseline(f.read())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Построение сезонного baseline со скетчами квантилей'
+    )
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('-o', '--output', default='baseline.json')
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    baseline = build_baseline_parallel(args.paths, args.workers, args.chunksize)  # noqa: E501
+    save_baseline(baseline, args.output)
+    print(baseline_table(baseline).to_string(index=False))
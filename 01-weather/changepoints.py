@@ -0,0 +1,115 @@
+import math
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+MIN_SEGMENT = 30
+# Верхняя граница оценки автокорреляции: при ρ → 1 σ неограниченно растет
+MAX_RHO = 0.99
+
+
+def deseasonalize(df_city):
+    """Аномалии температуры относительно среднего по сезону"""
+    seasons = df_city.groupby('season', observed=True)
+    seasonal_mean = seasons.temperature.transform('mean')
+    return df_city.temperature - seasonal_mean
+
+
+def mad_sigma(values):
+    return np.median(np.abs(values - np.median(values))) / 0.6745
+
+
+def noise_sigma(values):
+    """
+    Долгосрочный σ шума для порога CUSUM. Дневные аномалии сильно
+    автокоррелированы, и σ по первым разностям его занижает: порог
+    падает, появляются ложные точки. σ остатков берется по MAD,
+    ρ первого порядка — из отношения дисперсий разностей и уровней
+    (Var(Δx) = 2σ²(1 − ρ)), итог — σ·√((1 + ρ)/(1 − ρ)) как для AR(1)
+    """
+    sigma = mad_sigma(values)
+    diff_sigma = mad_sigma(np.diff(values)) / math.sqrt(2)
+    if not sigma:
+        return diff_sigma
+
+    rho = min(max(1 - (diff_sigma / sigma) ** 2, 0.0), MAX_RHO)
+    return sigma * math.sqrt((1 + rho) / (1 - rho))
+
+
+def detect_changepoints(values, penalty=None, min_size=MIN_SEGMENT):
+    """
+    Бинарная сегментация по CUSUM-статистике сдвига среднего.
+    Каждый уровень рекурсии векторизован, итог O(n log n)
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n < 2 * min_size:
+        return []
+
+    sigma = noise_sigma(values)
+    if not sigma:
+        return []
+    if penalty is None:
+        penalty = 3 * math.log(n)
+
+    csum = np.concatenate([[0.0], np.cumsum(values)])
+    breakpoints = []
+    segments = [(0, n)]
+
+    while segments:
+        start, end = segments.pop()
+        length = end - start
+        if length < 2 * min_size:
+            continue
+
+        split = np.arange(start + min_size, end - min_size + 1)
+        left_size = split - start
+        right_size = end - split
+        left_sum = csum[split] - csum[start]
+        right_sum = csum[end] - csum[split]
+
+        gain = (left_sum / left_size - right_sum / right_size) ** 2 * left_size * right_size / length  # noqa: E501
+        best = np.argmax(gain)
+
+        if gain[best] / sigma ** 2 > penalty:
+            breakpoints.append(int(split[best]))
+            segments.append((start, split[best]))
+            segments.append((split[best], end))
+
+    return sorted(breakpoints)
+
+
+def city_changepoints(df_city, penalty=None, min_size=MIN_SEGMENT):
+    df_city = df_city.dropna(subset=['temperature']).sort_values('timestamp')
+    anomalies = deseasonalize(df_city).to_numpy()
+    breakpoints = detect_changepoints(anomalies, penalty, min_size)
+
+    bounds = [0, *breakpoints, len(anomalies)]
+    means = [anomalies[a:b].mean() for a, b in zip(bounds, bounds[1:])]
+    timestamps = pd.to_datetime(df_city.timestamp).to_numpy()
+
+    return pd.DataFrame({
+        'city': df_city.city.iloc[0] if len(df_city) else None,
+        'timestamp': timestamps[breakpoints],
+        'shift': np.diff(means),
+    })
+
+
+def detect_all(data, max_workers=None, penalty=None, min_size=MIN_SEGMENT):
+    """Поиск точек смены режима по всем городам в параллельных процессах"""
+    frames = [frame for _, frame in data.groupby('city', observed=True)]
+    if not frames:
+        return pd.DataFrame(columns=['city', 'timestamp', 'shift'])
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(
+            city_changepoints,
+            frames,
+            [penalty] * len(frames),
+            [min_size] * len(frames),
+        ))
+
+    return pd.concat(results, ignore_index=True)
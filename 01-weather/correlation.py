@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+
+def anomaly_matrix(data, window='30d'):
+    """
+    Матрица дата × город аномалий: температура минус скользящее среднее.
+    Скользящее окно считается сразу по всем колонкам
+    """
+    pivot = data.pivot_table(
+        index='timestamp',
+        columns='city',
+        values='temperature',
+        aggfunc='mean',
+        observed=True,
+    ).sort_index()
+    pivot.index = pd.to_datetime(pivot.index)
+    return pivot - pivot.rolling(window, min_periods=1).mean()
+
+
+def correlation_matrix(anomalies, min_periods=30):
+    """
+    Полная корреляционная матрица одним матричным умножением.
+    Пропуски обнуляются после стандартизации, число общих наблюдений
+    для каждой пары считается тем же способом по маске
+    """
+    values = anomalies.to_numpy(dtype=np.float64)
+    mask = ~np.isnan(values)
+
+    z = (values - np.nanmean(values, axis=0)) / np.nanstd(values, axis=0, ddof=1)  # noqa: E501
+    z = np.where(mask, z, 0.0)
+
+    weights = mask.astype(np.float64)
+    pairs = weights.T @ weights
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = (z.T @ z) / (pairs - 1)
+    corr[pairs < min_periods] = np.nan
+    np.clip(corr, -1, 1, out=corr)
+
+    return pd.DataFrame(corr, index=anomalies.columns, columns=anomalies.columns)  # noqa: E501
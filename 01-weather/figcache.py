@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from collections import OrderedDict
+
+
+FIGURE_CACHE_DIR = os.environ.get(
+    'WEATHER_FIGURE_CACHE',
+    os.path.join(tempfile.gettempdir(), 'weather_figures'),
+)
+
+
+def dataset_hash(*payloads):
+    digest = hashlib.sha1()
+    for payload in payloads:
+        if payload is not None:
+            digest.update(payload)
+    return digest.hexdigest()
+
+
+class FigureCache:
+    """
+    Кэш JSON-спецификаций Plotly-графиков: LRU в памяти поверх
+    файлов на диске. Ключ — (хэш данных, город, окно, режим).
+    Экземпляр общий для всех сессий Streamlit, поэтому LRU под
+    блокировкой; на диске хранится не больше max_disk_bytes, самые
+    давно использованные файлы удаляются первыми
+    """
+
+    def __init__(
+        self,
+        directory=FIGURE_CACHE_DIR,
+        max_items=64,
+        max_disk_bytes=256 * 1024 * 1024,
+    ):
+        self.directory = directory
+        self.max_items = max_items
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        name = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, f'{name}.json')
+
+    def _remember(self, key, spec):
+        with self.lock:
+            self.memory[key] = spec
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_items:
+                self.memory.popitem(last=False)
+
+    def _prune_disk(self):
+        """Удаляет самые старые по mtime файлы сверх лимита"""
+        files = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def get(self, key):
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                return self.memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                spec = json.load(f)
+            # mtime — время последнего использования для вытеснения
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        self._remember(key, spec)
+        return spec
+
+    def put(self, key, fig):
+        payload = fig.to_json()
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        self._prune_disk()
+
+        spec = json.loads(payload)
+        self._remember(key, spec)
+        return spec
+
+    def get_or_build(self, key, build):
+        spec = self.get(key)
+        if spec is None:
+            spec = self.put(key, build())
+        return spec
@@ -0,0 +1,192 @@
+import glob
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from pandas.api.types import union_categoricals
+
+from baseline import MONTH_TO_SEASON
+
+
+CSV_SUFFIXES = ('.csv', '.csv.gz', '.csv.zst')
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz')
+COMPRESSION = {'.gz': 'gzip', '.zst': 'zstd'}
+MAX_GAP_DAYS = 3
+
+COMPACT_DTYPES = {
+    'city': 'category',
+    'season': 'category',
+    'temperature': 'float32',
+}
+
+
+def compression_for(name):
+    return COMPRESSION.get(os.path.splitext(name)[1].lower())
+
+
+def is_csv(name):
+    return name.lower().endswith(CSV_SUFFIXES)
+
+
+def is_archive(name):
+    return name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def read_csv(source, name):
+    """Чтение одного CSV (путь или файловый объект) сразу в компактные типы"""
+    return pd.read_csv(
+        source,
+        compression=compression_for(name),
+        dtype=COMPACT_DTYPES,
+        parse_dates=['timestamp'],
+    )
+
+
+def read_member(member):
+    """
+    Чтение CSV по пути или члена zip по паре (путь архива, имя):
+    процесс открывает файл сам, байты между процессами не передаются
+    """
+    if isinstance(member, tuple):
+        path, name = member
+        with zipfile.ZipFile(path) as archive, archive.open(name) as source:
+            return read_csv(source, name)
+    return read_csv(member, member)
+
+
+def archive_members(path, workdir):
+    """
+    CSV внутри архива. Члены zip читаются процессами напрямую;
+    tar (в том числе сжатый) не дает произвольного доступа, поэтому
+    его CSV за один проход распаковываются в workdir
+    """
+    if path.lower().endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            return [
+                (path, info.filename)
+                for info in archive.infolist()
+                if is_csv(info.filename)
+            ]
+
+    members = []
+    with tarfile.open(path, mode='r:*') as archive:
+        for info in archive:
+            if not (info.isfile() and is_csv(info.name)):
+                continue
+            target = os.path.join(workdir, f'{len(members)}-{os.path.basename(info.name)}')  # noqa: E501
+            with archive.extractfile(info) as source, open(target, 'wb') as f:  # noqa: E501
+                shutil.copyfileobj(source, f)
+            members.append(target)
+    return members
+
+
+def expand_source(source, workdir):
+    """
+    Разворачивает источник в список CSV: архив, каталог, glob или файл
+    """
+    if os.path.isdir(source):
+        source = os.path.join(source, '**', '*')
+
+    if is_archive(source) and os.path.isfile(source):
+        return archive_members(source, workdir)
+
+    paths = sorted(glob.glob(source, recursive=True)) or [source]
+    members = []
+    for path in paths:
+        if is_archive(path):
+            members.extend(archive_members(path, workdir))
+        elif is_csv(path):
+            members.append(path)
+    return members
+
+
+def concat_compact(frames):
+    """
+    Склейка без промежуточных object-колонок: категории выравниваются
+    до общего словаря, после чего concat остается категориальным
+    """
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DataFrame(columns=['city', 'timestamp', 'temperature', 'season']).astype(COMPACT_DTYPES)  # noqa: E501
+
+    for column, dtype in COMPACT_DTYPES.items():
+        if dtype != 'category':
+            continue
+        categories = union_categoricals([frame[column] for frame in frames]).categories  # noqa: E501
+        for frame in frames:
+            frame[column] = frame[column].cat.set_categories(categories)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_temperature_data(source, payload=None, max_workers=None):
+    """
+    Загрузка CSV, архива, каталога или glob. payload — байты
+    загруженного файла: одиночный CSV читается прямо из памяти, архив
+    сначала пишется во временный файл, и процессы читают его с диска
+    вместо копии всех байтов в каждом из них
+    """
+    if payload is not None and not is_archive(source):
+        return concat_compact([read_csv(io.BytesIO(payload), source)])
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if payload is not None:
+            source = os.path.join(workdir, os.path.basename(source))
+            with open(source, 'wb') as f:
+                f.write(payload)
+
+        members = expand_source(source, workdir)
+        if len(members) == 1:
+            return concat_compact([read_member(members[0])])
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return concat_compact(list(executor.map(read_member, members)))
+
+
+def is_subdaily(data):
+    """Есть ли у какого-либо города больше одного измерения в день"""
+    days = pd.DataFrame({
+        'city': data.city,
+        'day': data.timestamp.dt.normalize(),
+    })
+    return bool(days.duplicated().any())
+
+
+def fill_short_gaps(frame, max_gap=MAX_GAP_DAYS):
+    """
+    Линейная интерполяция только для пропусков не длиннее max_gap дней;
+    длинные пропуски остаются NaN целиком
+    """
+    missing = frame.isna()
+    runs = (~missing).cumsum()
+    gap_length = missing.apply(lambda column: column.groupby(runs[column.name]).transform('sum'))  # noqa: E501
+    interpolated = frame.interpolate(limit_area='inside')
+    return frame.where(~missing | (gap_length > max_gap), interpolated)
+
+
+def resample_daily(raw, max_gap=MAX_GAP_DAYS):
+    """
+    Подсуточные ряды -> дневные mean/min/max по каждому городу.
+    Ресемплинг по городу не выходит за его диапазон дат, поэтому
+    интерполяция по склеенной таблице не смешивает города
+    """
+    daily = (
+        raw.set_index('timestamp')
+        .groupby('city', observed=True)
+        .temperature.resample('D')
+        .agg(['mean', 'min', 'max'])
+    )
+    daily = fill_short_gaps(daily, max_gap).reset_index().rename(columns={
+        'mean': 'temperature',
+        'min': 'temperature_min',
+        'max': 'temperature_max',
+    })
+    daily['season'] = daily.timestamp.dt.month.map(MONTH_TO_SEASON).astype('category')  # noqa: E501
+    return daily
@@ -0,0 +1,76 @@
+import argparse
+import asyncio
+import random
+import time
+
+import aiohttp
+import numpy as np
+
+
+CITIES = [
+    'New York', 'London', 'Paris', 'Tokyo', 'Moscow', 'Sydney', 'Berlin',
+    'Beijing', 'Rio de Janeiro', 'Dubai', 'Los Angeles', 'Singapore',
+    'Mumbai', 'Cairo', 'Mexico City',
+]
+
+
+def random_query():
+    return {
+        'city': random.choice(CITIES),
+        'temperature': round(random.uniform(-20, 45), 1),
+        'month': random.randint(1, 12),
+    }
+
+
+def server_duration(response):
+    timing = response.headers.get('Server-Timing', '')
+    return float(timing.split('dur=')[1]) if 'dur=' in timing else np.nan
+
+
+async def worker(session, url, batch_size, jobs, client, server):
+    while jobs:
+        jobs.pop()
+        started = time.perf_counter()
+        if batch_size > 1:
+            payload = [random_query() for _ in range(batch_size)]
+            response = await session.post(f'{url}/check/batch', json=payload)
+        else:
+            response = await session.get(f'{url}/check', params=random_query())
+        async with response:
+            await response.read()
+            client.append((time.perf_counter() - started) * 1000)
+            server.append(server_duration(response))
+
+
+def report(name, values):
+    p50, p95, p99 = np.nanpercentile(values, [50, 95, 99])
+    print(f'{name}: p50={p50:.3f} ms  p95={p95:.3f} ms  p99={p99:.3f} ms')
+
+
+async def main(url, requests, concurrency, batch_size):
+    jobs = list(range(requests))
+    client, server = [], []
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            worker(session, url, batch_size, jobs, client, server)
+            for _ in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+    print(f'Запросов: {requests}, конкурентность: {concurrency}, батч: {batch_size}')  # noqa: E501
+    print(f'Пропускная способность: {requests / elapsed:.0f} req/s')
+    report('Клиент', client)
+    report('Сервер', server)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Нагрузочный тест service.py')
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('-n', '--requests', type=int, default=10_000)
+    parser.add_argument('-c', '--concurrency', type=int, default=32)
+    parser.add_argument('-b', '--batch-size', type=int, default=1)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.url, args.requests, args.concurrency, args.batch_size))  # noqa: E501
@@ -0,0 +1,175 @@
+import argparse
+import math
+import time
+
+from datetime import date
+
+from aiohttp import web
+
+from baseline import (
+    MONTH_TO_SEASON,
+    PERCENTILES,
+    baseline_from_csv,
+    is_abnormal,
+    load_baseline,
+)
+
+
+def normalize_city(city):
+    return ' '.join(city.split()).casefold()
+
+
+def finite_or_none(value):
+    """NaN (например, std сезона с одним наблюдением) — null в JSON"""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+class BaselineIndex:
+    """
+    Индекс (город, сезон) -> готовые пороги; запрос — один поиск в dict
+    """
+
+    def __init__(self, baseline):
+        self.cities = {}
+        self.entries = {}
+        for (city, season), stats in baseline.items():
+            p5, p50, p95 = (float(value) for value in stats.sketch.quantile(PERCENTILES))  # noqa: E501
+            self.cities[normalize_city(city)] = city
+            self.entries[(normalize_city(city), season)] = {
+                'mean': stats.mean,
+                'std': stats.std,
+                'lower': stats.mean - 2 * stats.std,
+                'upper': stats.mean + 2 * stats.std,
+                'p5': p5,
+                'p50': p50,
+                'p95': p95,
+            }
+
+    @classmethod
+    def from_path(cls, path):
+        if path.endswith('.csv'):
+            return cls(baseline_from_csv(path))
+        return cls(load_baseline(path))
+
+    def check(self, city, temperature, month=None):
+        """KeyError — только если для города и сезона нет базы"""
+        key = normalize_city(city)
+        season = MONTH_TO_SEASON[date.today().month if month is None else month]  # noqa: E501
+        entry = self.entries.get((key, season))
+        if entry is None:
+            raise KeyError(city)
+
+        outside_sigma = None
+        if math.isfinite(entry['std']):
+            outside_sigma = not entry['lower'] <= temperature <= entry['upper']
+        result = {
+            'city': self.cities[key],
+            'season': season,
+            'temperature': temperature,
+            **entry,
+            'is_abnormal': outside_sigma,
+            'is_abnormal_percentile': is_abnormal(temperature, entry['p5'], entry['p95']),  # noqa: E501
+        }
+        return {name: finite_or_none(value) for name, value in result.items()}
+
+
+def parse_query(query):
+    """Проверка запроса; любая ошибка — ValueError (ответ 400)"""
+    if not isinstance(query, dict):
+        raise ValueError('Запрос должен быть объектом')
+
+    city = query.get('city')
+    if not isinstance(city, str) or not city.strip():
+        raise ValueError('Не указан город')
+
+    try:
+        temperature = float(query['temperature'])
+    except KeyError:
+        raise ValueError('Не указана температура')
+    except (TypeError, ValueError):
+        raise ValueError(f'Некорректная температура: {query["temperature"]!r}')  # noqa: E501
+    if not math.isfinite(temperature):
+        raise ValueError(f'Некорректная температура: {query["temperature"]!r}')  # noqa: E501
+
+    month = query.get('month')
+    if month is None or month == '':
+        month = None
+    elif isinstance(month, str) and month.isdecimal():
+        month = int(month)
+    elif type(month) is not int:
+        # bool — подкласс int, а float при int() молча отбросил бы дробь
+        raise ValueError(f'Некорректный месяц: {month!r}')
+    if month is not None and month not in MONTH_TO_SEASON:
+        raise ValueError(f'Некорректный месяц: {query["month"]!r}')
+    return city, temperature, month
+
+
+@web.middleware
+async def timing_middleware(request, handler):
+    started = time.perf_counter()
+    response = await handler(request)
+    elapsed = (time.perf_counter() - started) * 1000
+    response.headers['Server-Timing'] = f'app;dur={elapsed:.4f}'
+    return response
+
+
+async def check(request):
+    index = request.app['index']
+    try:
+        query = parse_query(dict(request.query))
+    except ValueError as e:
+        raise web.HTTPBadRequest(text=str(e))
+    try:
+        return web.json_response(index.check(*query))
+    except KeyError as e:
+        raise web.HTTPNotFound(text=f'Нет данных для {e}')
+
+
+async def check_batch(request):
+    """
+    Пакетная проверка: некорректный запрос в пакете — 400 для всего
+    пакета, нет базы для города и сезона — null на его месте
+    """
+    index = request.app['index']
+    try:
+        queries = await request.json()
+        if not isinstance(queries, list):
+            raise ValueError('Ожидается список запросов')
+        queries = [parse_query(query) for query in queries]
+    except ValueError as e:
+        raise web.HTTPBadRequest(text=str(e))
+
+    results = []
+    for query in queries:
+        try:
+            results.append(index.check(*query))
+        except KeyError:
+            results.append(None)
+    return web.json_response(results)
+
+
+async def health(request):
+    return web.json_response({'entries': len(request.app['index'].entries)})
+
+
+def create_app(baseline_path):
+    app = web.Application(middlewares=[timing_middleware])
+    app['index'] = BaselineIndex.from_path(baseline_path)
+    app.router.add_get('/check', check)
+    app.router.add_post('/check/batch', check_batch)
+    app.router.add_get('/health', health)
+    return app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='HTTP-сервис проверки аномальности температуры'
+    )
+    parser.add_argument('baseline', help='baseline.json или CSV с данными')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    args = parser.parse_args()
+
+    web.run_app(create_app(args.baseline), host=args.host, port=args.port)
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from changepoints import city_changepoints, detect_changepoints
+
+
+DAYS = pd.date_range('2010-01-01', periods=3650)
+SEASONS = pd.Series(DAYS.month % 12 // 3).map(
+    {0: 'winter', 1: 'spring', 2: 'summer', 3: 'autumn'}
+)
+
+
+def ar1(rng, rho, n=len(DAYS), scale=3.0):
+    noise = rng.normal(0, scale, n)
+    values = np.zeros(n)
+    for i in range(1, n):
+        values[i] = rho * values[i - 1] + noise[i]
+    return values
+
+
+def city_frame(temperature):
+    return pd.DataFrame({
+        'city': 'Test',
+        'timestamp': DAYS,
+        'temperature': temperature,
+        'season': SEASONS,
+    })
+
+
+def test_white_noise_with_seasonality_has_no_breakpoints():
+    rng = np.random.default_rng(1)
+    cycle = 12 - 12 * np.cos(2 * np.pi * np.arange(len(DAYS)) / 365.25)
+    for _ in range(5):
+        temperature = cycle + rng.normal(0, 5, len(DAYS))
+        assert city_changepoints(city_frame(temperature)).empty
+
+
+def test_autocorrelated_noise_has_no_breakpoints():
+    rng = np.random.default_rng(2)
+    for _ in range(5):
+        assert detect_changepoints(ar1(rng, 0.8)) == []
+
+
+def test_mean_shift_is_found():
+    rng = np.random.default_rng(3)
+    values = ar1(rng, 0.7)
+    values[2000:] += 5
+    breakpoints = detect_changepoints(values)
+    assert any(abs(point - 2000) < 60 for point in breakpoints)
@@ -0,0 +1,105 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from baseline import SeasonStats, save_baseline
+from service import create_app, parse_query
+
+
+@pytest.mark.parametrize('month, expected', [
+    (None, None),
+    ('', None),
+    (6, 6),
+    ('12', 12),
+])
+def test_parse_query_month(month, expected):
+    query = {'city': 'Paris', 'temperature': '20.5', 'month': month}
+    assert parse_query(query) == ('Paris', 20.5, expected)
+
+
+@pytest.mark.parametrize('month', [6.7, 6.0, True, False, '6.7', ' 6', '-1', 0, 13, [6]])  # noqa: E501
+def test_parse_query_rejects_bad_month(month):
+    with pytest.raises(ValueError):
+        parse_query({'city': 'Paris', 'temperature': 20, 'month': month})
+
+
+@pytest.mark.parametrize('query', [
+    [],
+    {'temperature': 20},
+    {'city': ' ', 'temperature': 20},
+    {'city': 'Paris'},
+    {'city': 'Paris', 'temperature': 'warm'},
+    {'city': 'Paris', 'temperature': 'nan'},
+])
+def test_parse_query_rejects_bad_query(query):
+    with pytest.raises(ValueError):
+        parse_query(query)
+
+
+def request(tmp_path, method, path, **kwargs):
+    baseline = {
+        ('Paris', 'summer'): SeasonStats().update(np.arange(10.0, 30.0, 0.1)),  # noqa: E501
+        ('Paris', 'winter'): SeasonStats().update([1.0]),
+    }
+    save_baseline(baseline, tmp_path / 'baseline.json')
+
+    async def run():
+        client = TestClient(TestServer(create_app(str(tmp_path / 'baseline.json'))))  # noqa: E501
+        await client.start_server()
+        try:
+            response = await client.request(method, path, **kwargs)
+            if response.content_type == 'application/json':
+                return response.status, await response.json()
+            return response.status, await response.text()
+        finally:
+            await client.close()
+
+    return asyncio.run(run())
+
+
+def test_check_endpoint(tmp_path):
+    status, body = request(tmp_path, 'GET', '/check', params={
+        'city': ' paris ', 'temperature': '35', 'month': '7',
+    })
+    assert status == 200
+    assert body['city'] == 'Paris'
+    assert body['season'] == 'summer'
+    assert body['is_abnormal_percentile'] is True
+
+
+def test_check_endpoint_nan_std_is_null(tmp_path):
+    status, body = request(tmp_path, 'GET', '/check', params={
+        'city': 'Paris', 'temperature': '1', 'month': '1',
+    })
+    assert status == 200
+    assert body['std'] is None
+    assert body['is_abnormal'] is None
+
+
+@pytest.mark.parametrize('params, expected', [
+    ({'city': 'Paris', 'temperature': '20', 'month': '6.7'}, 400),
+    ({'city': 'Paris', 'temperature': '20', 'month': '13'}, 400),
+    ({'city': 'Paris', 'temperature': 'warm'}, 400),
+    ({'city': 'Oslo', 'temperature': '20', 'month': '7'}, 404),
+])
+def test_check_endpoint_errors(tmp_path, params, expected):
+    status, _ = request(tmp_path, 'GET', '/check', params=params)
+    assert status == expected
+
+
+def test_check_batch(tmp_path):
+    status, body = request(tmp_path, 'POST', '/check/batch', json=[
+        {'city': 'Paris', 'temperature': 20, 'month': 7},
+        {'city': 'Oslo', 'temperature': 20, 'month': 7},
+    ])
+    assert status == 200
+    assert body[0]['is_abnormal_percentile'] is False
+    assert body[1] is None
+
+    status, _ = request(tmp_path, 'POST', '/check/batch', json=[
+        {'city': 'Paris', 'temperature': 20, 'month': 6.7},
+    ])
+    assert status == 400
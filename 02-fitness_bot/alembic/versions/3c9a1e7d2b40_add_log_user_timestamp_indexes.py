@@ -0,0 +1,44 @@
+"""Add (user_id, timestamp) covering indexes to log tables
+
+Revision ID: 3c9a1e7d2b40
+Revises: 5f4d9d24dc94
+Create Date: 2026-10-19 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9a1e7d2b40'
+down_revision: Union[str, None] = '5f4d9d24dc94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_water_logs_user_id_timestamp',
+        'water_logs',
+        ['user_id', 'timestamp', 'amount'],
+        if_not_exists=True,
+    )
+    op.create_index(
+        'ix_food_logs_user_id_timestamp',
+        'food_logs',
+        ['user_id', 'timestamp', 'calories'],
+        if_not_exists=True,
+    )
+    op.create_index(
+        'ix_workout_logs_user_id_timestamp',
+        'workout_logs',
+        ['user_id', 'timestamp', 'calories_burned'],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_workout_logs_user_id_timestamp', table_name='workout_logs')  # noqa: E501
+    op.drop_index('ix_food_logs_user_id_timestamp', table_name='food_logs')
+    op.drop_index('ix_water_logs_user_id_timestamp', table_name='water_logs')
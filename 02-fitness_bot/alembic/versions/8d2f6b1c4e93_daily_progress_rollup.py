@@ -0,0 +1,32 @@
+"""Maintain daily_progress as a (user_id, date) rollup
+
+Revision ID: 8d2f6b1c4e93
+Revises: 3c9a1e7d2b40
+Create Date: 2026-10-19 11:03:27.552190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f6b1c4e93'
+down_revision: Union[str, None] = '3c9a1e7d2b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('daily_progress') as batch_op:
+        batch_op.add_column(
+            sa.Column('workout_count', sa.Integer(), nullable=True)
+        )
+        batch_op.create_unique_constraint('uq_user_date', ['user_id', 'date'])  # noqa: E501
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('daily_progress') as batch_op:
+        batch_op.drop_constraint('uq_user_date', type_='unique')
+        batch_op.drop_column('workout_count')
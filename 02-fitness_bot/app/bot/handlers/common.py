@@ -22,6 +22,8 @@ async def cmd_help(message: Message):
     /log_food <продукт> - Записать приём пищи
     /log_workout <тип> <минуты> - Записать тренировку
     /check_progress - Посмотреть прогресс за день
+    /weekly_stats - Статистика за неделю
+    /monthly_stats - Статистика за месяц
     /help - Показать это сообщение
     """
     await message.answer(help_text)
@@ -1,9 +1,15 @@
-from app.db.database import async_session_maker
+from typing import Optional
+
 from aiogram import Router
 from aiogram.types import Message
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from aiohttp import ClientSession
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.bot.middlewares.metrics_middleware import record_handler_error
+from app.db.writer import LogWriter
+from app.integrations.food_catalog import FoodCatalog
 from app.services.food_service import FoodService
 
 
@@ -27,7 +33,13 @@ async def cmd_food(message: Message, state: FSMContext):
 
 
 @router.message(FoodStates.waiting_for_food)
-async def process_food_name(message: Message, state: FSMContext):
+async def process_food_name(
+    message: Message,
+    state: FSMContext,
+    session: AsyncSession,
+    http_session: ClientSession,
+    food_catalog: Optional[FoodCatalog]
+):
     """Обработка названия продукта"""
     try:
         if message.text.startswith('/'):
@@ -35,36 +47,36 @@ async def process_food_name(message: Message, state: FSMContext):
             await message.answer("Поиск продукта отменен")
             return
 
-        async with async_session_maker() as session:
-            food_service = FoodService(session=session)
-            food_items = await food_service.search_food(message.text)
-
-            if not food_items:
-                await message.answer(
-                    "❌ Продукт не найден. Попробуйте ввести другое название.\n"
-                    "Например: молоко, хлеб, банан"
-                )
-                return
+        food_service = FoodService(session, http_session, food_catalog)
+        food_items = await food_service.search_food(message.text)
 
-            await state.update_data(
-                food_items=food_items,
-                selected_food=food_items[0]
+        if not food_items:
+            await message.answer(
+                "❌ Продукт не найден. Попробуйте ввести другое название.\n"
+                "Например: молоко, хлеб, банан"
             )
+            return
 
-            food = food_items[0]
-            nutritional_info = (
-                f"📋 Найден продукт: {food['name']}\n"
-                f"🔸 Калорийность: {food['calories']:.1f} ккал/100г\n"
-                f"🔸 Белки: {food.get('proteins', 0):.1f} г\n"
-                f"🔸 Жиры: {food.get('fats', 0):.1f} г\n"
-                f"🔸 Углеводы: {food.get('carbs', 0):.1f} г\n\n"
-                "⚖️ Введите размер порции в граммах (1-2000):"
-            )
+        await state.update_data(
+            food_items=food_items,
+            selected_food=food_items[0]
+        )
+
+        food = food_items[0]
+        nutritional_info = (
+            f"📋 Найден продукт: {food['name']}\n"
+            f"🔸 Калорийность: {food['calories']:.1f} ккал/100г\n"
+            f"🔸 Белки: {food.get('proteins', 0):.1f} г\n"
+            f"🔸 Жиры: {food.get('fats', 0):.1f} г\n"
+            f"🔸 Углеводы: {food.get('carbs', 0):.1f} г\n\n"
+            "⚖️ Введите размер порции в граммах (1-2000):"
+        )
 
-            await message.answer(nutritional_info)
-            await state.set_state(FoodStates.waiting_for_portion)
+        await message.answer(nutritional_info)
+        await state.set_state(FoodStates.waiting_for_portion)
 
-    except Exception:
+    except Exception as e:
+        record_handler_error(e)
         await message.answer(
             "❌ Произошла ошибка при поиске продукта.\n"
             "Пожалуйста, попробуйте позже."
@@ -73,7 +85,13 @@ async def process_food_name(message: Message, state: FSMContext):
 
 
 @router.message(FoodStates.waiting_for_portion)
-async def process_portion(message: Message, state: FSMContext):
+async def process_portion(
+    message: Message,
+    state: FSMContext,
+    session: AsyncSession,
+    http_session: ClientSession,
+    log_writer: Optional[LogWriter] = None
+):
     """Обработка размера порции"""
     try:
         if message.text.startswith('/'):
@@ -100,30 +118,34 @@ async def process_portion(message: Message, state: FSMContext):
         selected_food = user_data['selected_food']
         calories = (selected_food['calories'] * portion) / 100
 
-        async with async_session_maker() as session:
-            food_service = FoodService(session=session)
-            await food_service.log_food(
-                user_id=message.from_user.id,
-                food_name=selected_food['name'],
-                portion=portion,
-                calories=calories
-            )
+        food_service = FoodService(
+            session,
+            http_session,
+            log_writer=log_writer
+        )
+        await food_service.log_food(
+            user_id=message.from_user.id,
+            food_name=selected_food['name'],
+            portion=portion,
+            calories=calories
+        )
 
-            consumed, target = await food_service.get_daily_progress(message.from_user.id)  # noqa: E501
+        consumed, target = await food_service.get_daily_progress(message.from_user.id)  # noqa: E501
 
-            remaining = max(0, target - consumed)
-            progress_percentage = min(100, (consumed / target) * 100)
+        remaining = max(0, target - consumed)
+        progress_percentage = min(100, (consumed / target) * 100)
 
-            await message.answer(
-                f"✅ Продукт записан!\n\n"
-                f"📊 Ваш прогресс на сегодня:\n"
-                f"Съедено: {consumed:.0f} ккал\n"
-                f"Осталось: {remaining:.0f} ккал\n"
-                f"Прогресс: {progress_percentage:.1f}%"
-            )
-            await state.clear()
+        await message.answer(
+            f"✅ Продукт записан!\n\n"
+            f"📊 Ваш прогресс на сегодня:\n"
+            f"Съедено: {consumed:.0f} ккал\n"
+            f"Осталось: {remaining:.0f} ккал\n"
+            f"Прогресс: {progress_percentage:.1f}%"
+        )
+        await state.clear()
 
-    except Exception:
+    except Exception as e:
+        record_handler_error(e)
         await message.answer(
             "❌ Произошла ошибка при сохранении данных.\n"
             "Пожалуйста, попробуйте позже."
@@ -3,7 +3,10 @@ from aiogram.types import Message
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from aiohttp import ClientSession
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.bot.middlewares.metrics_middleware import record_handler_error
 from app.services.profile_service import ProfileService
 from app.utils.validators import (
     validate_weight,
@@ -114,7 +117,12 @@ async def process_activity(message: Message, state: FSMContext):
 
 
 @router.message(ProfileStates.waiting_for_city)
-async def process_city(message: Message, state: FSMContext):
+async def process_city(
+    message: Message,
+    state: FSMContext,
+    session: AsyncSession,
+    http_session: ClientSession
+):
     """Завершение настройки профиля"""
     try:
         # Получаем данные из состояния
@@ -123,7 +131,7 @@ async def process_city(message: Message, state: FSMContext):
         user_data['user_id'] = message.from_user.id
 
         # Создаем сервис и сохраняем профиль
-        profile_service = ProfileService()
+        profile_service = ProfileService(session, http_session)
         await profile_service.create_or_update_profile(user_data)
 
         # Получаем профиль пользователя с рассчитанными целями
@@ -146,7 +154,8 @@ async def process_city(message: Message, state: FSMContext):
                 "Пожалуйста, попробуйте позже."
             )
 
-    except Exception:
+    except Exception as e:
+        record_handler_error(e)
         await message.answer(
             "Произошла ошибка при сохранении профиля. "
             "Пожалуйста, попробуйте позже."
@@ -157,10 +166,14 @@ async def process_city(message: Message, state: FSMContext):
 
 
 @router.message(Command("profile"))
-async def show_profile(message: Message):
+async def show_profile(
+    message: Message,
+    session: AsyncSession,
+    http_session: ClientSession
+):
     """Показать текущий профиль пользователя"""
     try:
-        profile_service = ProfileService()
+        profile_service = ProfileService(session, http_session)
         user_profile = await profile_service.get_profile(message.from_user.id)
 
         if not user_profile:
@@ -169,9 +182,6 @@ async def show_profile(message: Message):
             )
             return
 
-        calories = profile_service.calculate_daily_calories(user_profile)
-        water = profile_service.calculate_daily_water(user_profile)
-
         await message.answer(
             f"Ваш профиль:\n"
             f"Вес: {user_profile.weight} кг\n"
@@ -179,11 +189,12 @@ async def show_profile(message: Message):
             f"Возраст: {user_profile.age} лет\n"
             f"Город: {user_profile.city}\n"
             f"Уровень активности: {user_profile.activity_level}\n"
-            f"Дневная норма калорий: {calories} ккал\n"
-            f"Дневная норма воды: {water} мл"
+            f"Дневная норма калорий: {user_profile.calorie_goal} ккал\n"
+            f"Дневная норма воды: {user_profile.water_goal} мл"
         )
 
     except Exception as e:
+        record_handler_error(e)
         await message.answer(
             "Произошла ошибка при получении профиля. "
             "Пожалуйста, попробуйте позже."
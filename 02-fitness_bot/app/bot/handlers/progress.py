@@ -1,54 +1,101 @@
 from aiogram import Router
 from aiogram.types import Message
-from aiogram.filters import Command
-from app.db.database import async_session_maker
+from aiogram.filters import Command, CommandObject
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.bot.middlewares.metrics_middleware import record_handler_error
 from app.services.progress_service import ProgressService
 
 router = Router()
 
+# Команда статистики и число дней периода
+PERIODS = {"weekly_stats": 7, "monthly_stats": 30}
+
 
 @router.message(Command("check_progress"))
-async def cmd_check_progress(message: Message):
+async def cmd_check_progress(message: Message, session: AsyncSession):
     """Отображение прогресса за день"""
     try:
-        async with async_session_maker() as session:
-            progress_service = ProgressService(session)
-            progress = await progress_service.get_daily_progress(
-                message.from_user.id
-            )
-
-            # Создаем индикаторы прогресса
-            water_percentage = min(100, int(
-                progress.water_consumed / progress.water_target * 100)) if progress.water_target else 0  # noqa: E501
-            water_progress = "🌊" * (water_percentage // 20) + \
-                "⚪️" * (5 - water_percentage // 20)
-
-            calories_percentage = min(100, int(
-                progress.calories_consumed / progress.calories_target * 100)) if progress.calories_target else 0  # noqa: E501
-            calories_progress = "🔴" * \
-                (calories_percentage // 20) + "⚪️" * \
-                (5 - calories_percentage // 20)
-
-            await message.answer(
-                f"📊 Ваш прогресс за сегодня:\n\n"
-                f"💧 Вода: {
-                    progress.water_consumed}/{progress.water_target} мл\n"
-                f"{water_progress}\n\n"
-                f"🍎 Калории: {progress.calories_consumed}/{progress.calories_target} ккал\n"  # noqa: E501
-                f"{calories_progress}\n\n"
-                f"🏃‍♂️ Сожжено: {progress.calories_burned} ккал\n"
-                f"⚖️ Баланс: {progress.calories_remaining} ккал\n"
-                f"🏋️‍♂️ Тренировок: {progress.workout_count}\n\n"
-                f"{'✅ Отличная работа!' if progress.calories_remaining >=
-                    0 else '⚠️ Превышение калорий'}"
-            )
+        progress_service = ProgressService(session)
+        progress = await progress_service.get_daily_progress(
+            message.from_user.id
+        )
+
+        # Создаем индикаторы прогресса
+        water_percentage = min(100, int(
+            progress.water_consumed / progress.water_target * 100)) if progress.water_target else 0  # noqa: E501
+        water_progress = "🌊" * (water_percentage // 20) + \
+            "⚪️" * (5 - water_percentage // 20)
+
+        calories_percentage = min(100, int(
+            progress.calories_consumed / progress.calories_target * 100)) if progress.calories_target else 0  # noqa: E501
+        calories_progress = "🔴" * \
+            (calories_percentage // 20) + "⚪️" * \
+            (5 - calories_percentage // 20)
+
+        await message.answer(
+            f"📊 Ваш прогресс за сегодня:\n\n"
+            f"💧 Вода: {
+                progress.water_consumed}/{progress.water_target} мл\n"
+            f"{water_progress}\n\n"
+            f"🍎 Калории: {progress.calories_consumed}/{progress.calories_target} ккал\n"  # noqa: E501
+            f"{calories_progress}\n\n"
+            f"🏃‍♂️ Сожжено: {progress.calories_burned} ккал\n"
+            f"⚖️ Баланс: {progress.calories_remaining} ккал\n"
+            f"🏋️‍♂️ Тренировок: {progress.workout_count}\n\n"
+            f"{'✅ Отличная работа!' if progress.calories_remaining >=
+                0 else '⚠️ Превышение калорий'}"
+        )
 
     except ValueError:
         await message.answer(
             "❌ Ошибка: Пожалуйста, сначала настройте свой профиль с помощью /set_profile"  # noqa: E501
         )
-    except Exception:
+    except Exception as e:
+        record_handler_error(e)
         await message.answer(
             "❌ Произошла ошибка при получении прогресса.\n"
             "Пожалуйста, попробуйте позже."
         )
+
+
+@router.message(Command(*PERIODS))
+async def cmd_period_stats(
+    message: Message,
+    command: CommandObject,
+    session: AsyncSession
+):
+    """Статистика по дням за неделю или месяц"""
+    try:
+        progress_service = ProgressService(session)
+        stats = await progress_service.get_period_stats(
+            message.from_user.id,
+            PERIODS[command.command]
+        )
+
+        lines = [
+            f"{day.date:%d.%m}: 💧 {day.water_consumed:.0f} мл, "
+            f"🍎 {day.calories_consumed:.0f} ккал, "
+            f"🏃‍♂️ {day.calories_burned:.0f} ккал, "
+            f"🏋️‍♂️ {day.workout_count}"
+            for day in stats.daily_stats
+        ]
+        await message.answer(
+            f"📅 Статистика за {stats.start_date:%d.%m}–{stats.end_date:%d.%m}:\n\n"  # noqa: E501
+            + "\n".join(lines) +
+            f"\n\nВ среднем за день:\n"
+            f"💧 Вода: {stats.average_water_consumed:.0f} мл\n"
+            f"🍎 Калории: {stats.average_calories_consumed:.0f} ккал\n"
+            f"🏃‍♂️ Сожжено: {stats.average_calories_burned:.0f} ккал\n"
+            f"🏋️‍♂️ Тренировок за период: {stats.total_workouts}"
+        )
+
+    except ValueError:
+        await message.answer(
+            "❌ Ошибка: Пожалуйста, сначала настройте свой профиль с помощью /set_profile"  # noqa: E501
+        )
+    except Exception as e:
+        record_handler_error(e)
+        await message.answer(
+            "❌ Произошла ошибка при получении статистики.\n"
+            "Пожалуйста, попробуйте позже."
+        )
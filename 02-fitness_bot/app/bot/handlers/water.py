@@ -1,8 +1,13 @@
+from typing import Optional
+
 from aiogram import Router
 from aiogram.types import Message
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.bot.middlewares.metrics_middleware import record_handler_error
+from app.db.writer import LogWriter
 from app.services.water_service import WaterService
 from app.utils.exceptions import ValidationError
 import logging
@@ -27,7 +32,12 @@ async def cmd_water(message: Message, state: FSMContext):
 
 
 @router.message(WaterStates.waiting_for_amount)
-async def process_water_amount(message: Message, state: FSMContext):
+async def process_water_amount(
+    message: Message,
+    state: FSMContext,
+    session: AsyncSession,
+    log_writer: Optional[LogWriter] = None
+):
     """Обработка введенного количества воды"""
     try:
         # Пробуем преобразовать введенное значение в число
@@ -41,7 +51,7 @@ async def process_water_amount(message: Message, state: FSMContext):
             return
 
         # Создаем сервис и логируем воду
-        water_service = WaterService()
+        water_service = WaterService(session, log_writer)
         await water_service.log_water(message.from_user.id, amount)
 
         # Получаем прогресс за день
@@ -70,6 +80,7 @@ async def process_water_amount(message: Message, state: FSMContext):
         )
 
     except Exception as e:
+        record_handler_error(e)
         await message.answer(
             "Произошла ошибка при записи воды. "
             "Пожалуйста, попробуйте позже."
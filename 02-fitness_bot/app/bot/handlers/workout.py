@@ -1,9 +1,13 @@
+from typing import Optional
+
 from aiogram import Router
 from aiogram.types import Message
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from app.db.database import async_session_maker
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.bot.middlewares.metrics_middleware import record_handler_error
+from app.db.writer import LogWriter
 from app.services.workout_service import WorkoutService
 from app.schemas.workout import WorkoutCreate
 
@@ -100,13 +104,19 @@ async def process_duration(message: Message, state: FSMContext):
         )
         await state.set_state(WorkoutStates.waiting_for_intensity)
 
-    except Exception:
+    except Exception as e:
+        record_handler_error(e)
         await message.answer("❌ Произошла ошибка. Попробуйте позже.")
         await state.clear()
 
 
 @router.message(WorkoutStates.waiting_for_intensity)
-async def process_intensity(message: Message, state: FSMContext):
+async def process_intensity(
+    message: Message,
+    state: FSMContext,
+    session: AsyncSession,
+    log_writer: Optional[LogWriter] = None
+):
     """Обработка интенсивности тренировки"""
     try:
         if message.text.startswith('/'):
@@ -123,43 +133,43 @@ async def process_intensity(message: Message, state: FSMContext):
         intensity = INTENSITY_LEVELS[message.text]
         user_data = await state.get_data()
 
-        async with async_session_maker() as session:
-            workout_service = WorkoutService(session)
-            calories_burned = workout_service.calculate_calories_burned(
-                user_data['workout_type'],
-                user_data['duration'],
-                intensity
-            )
+        workout_service = WorkoutService(session, log_writer)
+        calories_burned = workout_service.calculate_calories_burned(
+            user_data['workout_type'],
+            user_data['duration'],
+            intensity
+        )
 
-            workout_data = WorkoutCreate(
-                user_id=message.from_user.id,
-                workout_type=user_data['workout_type'],
-                duration=user_data['duration'],
-                intensity=intensity,
-                calories_burned=calories_burned
-            )
+        workout_data = WorkoutCreate(
+            user_id=message.from_user.id,
+            workout_type=user_data['workout_type'],
+            duration=user_data['duration'],
+            intensity=intensity,
+            calories_burned=calories_burned
+        )
 
-            await workout_service.log_workout(workout_data)
-            daily_stats = await workout_service.get_daily_stats(
-                message.from_user.id
-            )
+        await workout_service.log_workout(workout_data)
+        daily_stats = await workout_service.get_daily_stats(
+            message.from_user.id
+        )
 
-            await message.answer(
-                f"✅ Тренировка записана!\n\n"
-                f"📊 Статистика за сегодня:\n"
-                f"🏃‍♂️ Тренировка: {user_data['workout_type']}\n"
-                f"⏱ Длительность: {user_data['duration']} мин\n"
-                f"🔥 Сожжено калорий: {calories_burned} ккал\n\n"
-                f"Всего за день:\n"
-                f"⚡️ Сожжено: {daily_stats.total_burned} ккал\n"
-                f"🎯 Съедено: {daily_stats.calories_consumed} ккал\n"
-                f"⭐️ Баланс: {daily_stats.calories_remaining} ккал\n"
-                f"🏋️‍♂️ Тренировок: {daily_stats.workout_count}"
-            )
+        await message.answer(
+            f"✅ Тренировка записана!\n\n"
+            f"📊 Статистика за сегодня:\n"
+            f"🏃‍♂️ Тренировка: {user_data['workout_type']}\n"
+            f"⏱ Длительность: {user_data['duration']} мин\n"
+            f"🔥 Сожжено калорий: {calories_burned} ккал\n\n"
+            f"Всего за день:\n"
+            f"⚡️ Сожжено: {daily_stats.total_burned} ккал\n"
+            f"🎯 Съедено: {daily_stats.calories_consumed} ккал\n"
+            f"⭐️ Баланс: {daily_stats.calories_remaining} ккал\n"
+            f"🏋️‍♂️ Тренировок: {daily_stats.workout_count}"
+        )
 
-            await state.clear()
+        await state.clear()
 
-    except Exception:
+    except Exception as e:
+        record_handler_error(e)
         await message.answer(
             "❌ Произошла ошибка при сохранении тренировки.\n"
             "Пожалуйста, попробуйте позже."
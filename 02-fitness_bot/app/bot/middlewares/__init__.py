@@ -1,7 +1,39 @@
 from aiogram import Dispatcher
 
-from app.bot.middlewares.common_middleware import LoggingMiddleware
+from config import settings
+from app.bot.middlewares.metrics_middleware import (
+    HandlerMetricsMiddleware,
+    UpdateMetricsMiddleware,
+)
+from app.bot.middlewares.query_middleware import (
+    QueryStatsMiddleware,
+    QueryTagMiddleware,
+)
+from app.bot.middlewares.session_middleware import DbSessionMiddleware
+from app.bot.middlewares.throttling_middleware import (
+    Limit,
+    ThrottlingMiddleware,
+)
+from app.db.database import async_session_maker
 
 
 def setup_middlewares(dp: Dispatcher) -> None:
-    dp.message.middleware(LoggingMiddleware())
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    dp.update.outer_middleware(QueryStatsMiddleware(
+        budget=settings.DB_QUERY_BUDGET,
+        repeat_threshold=settings.DB_REPEAT_THRESHOLD,
+    ))
+    dp.update.middleware(DbSessionMiddleware(async_session_maker))
+    dp.message.outer_middleware(ThrottlingMiddleware(
+        user_limit=Limit(settings.THROTTLE_RATE, settings.THROTTLE_BURST),
+        global_limit=Limit(
+            settings.THROTTLE_GLOBAL_RATE / settings.WORKERS,
+            max(1, settings.THROTTLE_GLOBAL_BURST // settings.WORKERS)
+        ),
+        command_limits={
+            command: Limit(*limit)
+            for command, limit in settings.THROTTLE_COMMANDS.items()
+        },
+    ))
+    dp.message.middleware(HandlerMetricsMiddleware())
+    dp.message.middleware(QueryTagMiddleware())
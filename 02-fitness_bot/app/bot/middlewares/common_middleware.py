@@ -1,13 +0,0 @@
-from aiogram import BaseMiddleware
-from aiogram.types import Message
-
-
-class LoggingMiddleware(BaseMiddleware):
-    async def __call__(
-        self,
-        handler,
-        event: Message,
-        data: dict
-    ):
-        print(f"Получено сообщение: {event.text}")
-        return await handler(event, data)
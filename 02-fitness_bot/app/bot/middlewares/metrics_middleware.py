@@ -0,0 +1,120 @@
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.types import TelegramObject, Update
+
+from app.utils.metrics import Counter, Gauge, Histogram
+
+
+UPDATES_IN_FLIGHT = Gauge(
+    "bot_updates_in_flight",
+    "Updates being processed right now",
+)
+UPDATE_LATENCY = Histogram(
+    "bot_update_duration_seconds",
+    "Full update processing time, middlewares included",
+    ["event_type"],
+)
+UPDATES_UNHANDLED = Counter(
+    "bot_updates_unhandled_total",
+    "Updates no handler matched",
+    ["event_type"],
+)
+HANDLER_LATENCY = Histogram(
+    "bot_handler_duration_seconds",
+    "Handler execution time",
+    ["router", "handler"],
+)
+HANDLER_ERRORS = Counter(
+    "bot_handler_errors_total",
+    "Errors raised by handlers or caught and answered by them",
+    ["router", "handler", "error"],
+)
+FSM_TRANSITIONS = Counter(
+    "bot_fsm_transitions_total",
+    "FSM state changes made by handlers",
+    ["from_state", "to_state"],
+)
+
+# Метки хендлера, который выполняется в текущей задаче
+current_handler: ContextVar[Optional[Dict[str, str]]] = ContextVar(
+    "current_handler", default=None
+)
+
+
+def record_handler_error(error: BaseException) -> None:
+    """
+    Учитывает ошибку, которую хендлер поймал и сам ответил пользователю:
+    до HandlerMetricsMiddleware такие исключения не доходят
+    """
+    labels = current_handler.get()
+    if labels is not None:
+        HANDLER_ERRORS.inc(error=type(error).__name__, **labels)
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Внешний middleware апдейтов: апдейты в работе и полное время"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        event_type = event.event_type
+        UPDATES_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            result = await handler(event, data)
+            if result is UNHANDLED:
+                UPDATES_UNHANDLED.inc(event_type=event_type)
+            return result
+        finally:
+            UPDATE_LATENCY.observe(
+                time.perf_counter() - started,
+                event_type=event_type
+            )
+            UPDATES_IN_FLIGHT.dec()
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Внутренний middleware событий: время и ошибки каждого хендлера
+    (роутер — модуль с хендлерами) и переходы FSM, которые он сделал
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        callback = data["handler"].callback
+        labels = {
+            "router": callback.__module__.rsplit(".", 1)[-1],
+            "handler": callback.__name__,
+        }
+        state_before = data.get("raw_state")
+        token = current_handler.set(labels)
+        started = time.perf_counter()
+        try:
+            result = await handler(event, data)
+        except Exception as e:
+            HANDLER_ERRORS.inc(error=type(e).__name__, **labels)
+            raise
+        finally:
+            HANDLER_LATENCY.observe(time.perf_counter() - started, **labels)
+            current_handler.reset(token)
+
+        state = data.get("state")
+        if state is not None:
+            state_after = await state.get_state()
+            if state_after != state_before:
+                FSM_TRANSITIONS.inc(
+                    from_state=state_before or "",
+                    to_state=state_after or ""
+                )
+        return result
@@ -0,0 +1,52 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from app.db.instrumentation import (
+    current_stats,
+    finish_tracking,
+    start_tracking,
+)
+
+
+class QueryStatsMiddleware(BaseMiddleware):
+    """
+    Учет SQL-запросов апдейта: количество, время и строки.
+    Апдейты сверх бюджета запросов и с повторами одного запроса
+    попадают в лог и метрики
+    """
+
+    def __init__(self, budget: int, repeat_threshold: int):
+        self.budget = budget
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        token = start_tracking(event.update_id)
+        try:
+            return await handler(event, data)
+        finally:
+            finish_tracking(token, self.budget, self.repeat_threshold)
+
+
+class QueryTagMiddleware(BaseMiddleware):
+    """Подписывает запросы апдейта именем выбранного хендлера"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        stats = current_stats.get()
+        if stats is not None:
+            callback = data["handler"].callback
+            stats.handler = (
+                f"{callback.__module__.rsplit('.', 1)[-1]}.{callback.__name__}"
+            )
+        return await handler(event, data)
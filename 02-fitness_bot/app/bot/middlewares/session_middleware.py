@@ -0,0 +1,86 @@
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+# Сессия апдейта, который обрабатывается в текущей задаче
+current_session: ContextVar[Optional[AsyncSession]] = ContextVar(
+    "current_session", default=None
+)
+
+
+async def finish_session(session: AsyncSession) -> None:
+    """
+    Коммит сессии; после ошибки записи (транзакция уже неактивна)
+    или неудачного коммита — откат. Коммит и откат делает только
+    middleware, сервисы и CRUD лишь пробрасывают ошибки
+    """
+    if not session.is_active:
+        await session.rollback()
+        return
+    try:
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """
+    Одна сессия БД на апдейт: передается в хендлеры как `session`,
+    коммитится перед первым ответом пользователю и еще раз после
+    обработки или откатывается при ошибке.
+    Соединение из пула берется только при первом запросе
+    """
+
+    def __init__(self, session_pool: async_sessionmaker[AsyncSession]):
+        self.session_pool = session_pool
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        async with self.session_pool() as session:
+            data["session"] = session
+            token = current_session.set(session)
+            try:
+                result = await handler(event, data)
+                await finish_session(session)
+                return result
+            except Exception:
+                await session.rollback()
+                raise
+            finally:
+                current_session.reset(token)
+
+
+class CommitBeforeReplyMiddleware(BaseRequestMiddleware):
+    """
+    Middleware запросов Bot API: перед отправкой коммитит сессию
+    текущего апдейта. Блокировка записи SQLite не держится на время
+    запроса к Telegram, а пользователь не получает «сохранено» для
+    транзакции, которая потом не закоммитится: ошибка коммита
+    выбрасывается из отправки, и хендлер отвечает сообщением об ошибке
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType]
+    ) -> Response[TelegramType]:
+        session = current_session.get()
+        if session is not None and session.in_transaction():
+            await finish_session(session)
+        return await make_request(bot, method)
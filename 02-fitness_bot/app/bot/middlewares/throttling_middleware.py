@@ -0,0 +1,147 @@
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import Message
+
+
+DEFAULT = "default"
+MAX_BUCKETS = 100000
+
+
+class Limit(NamedTuple):
+    # Пополнение, токенов в секунду, и емкость ведра (допустимый всплеск)
+    rate: float
+    burst: int
+
+    @property
+    def refill_time(self) -> float:
+        return self.burst / self.rate
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated", "warned", "global_warned")
+
+    def __init__(self, limit: Limit, now: float):
+        self.tokens = float(limit.burst)
+        self.updated = now
+        # Предупреждения об отказах по своему лимиту и по общему
+        self.warned = False
+        self.global_warned = False
+
+    def consume(self, limit: Limit, now: float) -> bool:
+        self.tokens = min(
+            limit.burst,
+            self.tokens + (now - self.updated) * limit.rate
+        )
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def refund(self, limit: Limit) -> None:
+        """Возврат токена за сообщение, отклоненное не этим ведром"""
+        self.tokens = min(limit.burst, self.tokens + 1)
+
+    def retry_after(self, limit: Limit) -> float:
+        return (1 - self.tokens) / limit.rate
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Ограничение частоты сообщений: ведро токенов на пользователя и
+    команду плюс одно общее ведро процесса. Отклоненное сообщение не
+    доходит до хендлеров и БД; предупреждение отправляется один раз
+    за серию отказов.
+
+    Ведро, простоявшее дольше времени полного пополнения, ничем не
+    отличается от нового, поэтому такие ведра вытесняются
+    """
+
+    def __init__(
+        self,
+        user_limit: Limit,
+        global_limit: Limit,
+        command_limits: Optional[Dict[str, Limit]] = None,
+        max_buckets: int = MAX_BUCKETS
+    ):
+        self.limits = {DEFAULT: user_limit, **(command_limits or {})}
+        self.global_limit = global_limit
+        self.max_buckets = max_buckets
+        self.idle_ttl = max(limit.refill_time for limit in self.limits.values())  # noqa: E501
+        self.buckets: OrderedDict[Tuple[int, str], TokenBucket] = OrderedDict()  # noqa: E501
+        self.global_bucket = TokenBucket(global_limit, time.monotonic())
+
+    async def __call__(
+        self,
+        handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
+        event: Message,
+        data: Dict[str, Any]
+    ) -> Any:
+        if event.from_user is None:
+            return await handler(event, data)
+
+        now = time.monotonic()
+        self._evict(now)
+
+        command = self._command(event.text)
+        limit = self.limits[command]
+        key = (event.from_user.id, command)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(limit, now)
+        else:
+            self.buckets.move_to_end(key)
+
+        if not bucket.consume(limit, now):
+            return await self._reject(event, bucket, bucket.retry_after(limit))  # noqa: E501
+        if not self.global_bucket.consume(self.global_limit, now):
+            # Пользователь не превысил свой лимит: токен возвращается
+            bucket.refund(limit)
+            retry_after = self.global_bucket.retry_after(self.global_limit)
+            return await self._reject(event, bucket, retry_after, overloaded=True)  # noqa: E501
+
+        bucket.warned = bucket.global_warned = False
+        return await handler(event, data)
+
+    def _command(self, text: str) -> str:
+        if not text or not text.startswith("/"):
+            return DEFAULT
+        command = text.split(maxsplit=1)[0][1:].split("@", 1)[0].lower()
+        return command if command in self.limits else DEFAULT
+
+    def _evict(self, now: float) -> None:
+        while self.buckets:
+            bucket = next(iter(self.buckets.values()))
+            if (
+                len(self.buckets) < self.max_buckets
+                and now - bucket.updated < self.idle_ttl
+            ):
+                break
+            self.buckets.popitem(last=False)
+
+    async def _reject(
+        self,
+        event: Message,
+        bucket: TokenBucket,
+        retry_after: float,
+        overloaded: bool = False
+    ) -> None:
+        retry_after = max(1, round(retry_after))
+        if overloaded:
+            if bucket.global_warned:
+                return
+            bucket.global_warned = True
+            await event.answer(
+                f"⏳ Бот сейчас перегружен. Повторите через {retry_after} сек."  # noqa: E501
+            )
+            return
+
+        if bucket.warned:
+            return
+        bucket.warned = True
+        await event.answer(
+            f"⏳ Слишком много запросов. Повторите через {retry_after} сек."
+        )
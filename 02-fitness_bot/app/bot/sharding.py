@@ -0,0 +1,270 @@
+import asyncio
+import ctypes
+import logging
+import multiprocessing
+import signal
+from collections import deque
+from multiprocessing.process import BaseProcess
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple  # noqa: E501
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.types import TelegramObject, Update
+
+
+logger = logging.getLogger(__name__)
+
+SUPERVISE_INTERVAL = 1.0
+STOP_TIMEOUT = 30.0
+
+
+# (порядковый номер в шарде, ключ шардирования, апдейт в JSON)
+ShardItem = Tuple[int, int, str]
+
+
+def shard_of(key: int, workers: int) -> int:
+    return key % workers
+
+
+class WorkerPool:
+    """
+    Процессы-обработчики апдейтов. У каждого своя очередь, свой Bot и
+    полный Dispatcher с роутерами из bot.py.
+
+    Апдейты шарда нумеруются по порядку; воркер публикует в общей
+    памяти номер, до которого включительно все обработано (без
+    блокировок, поэтому убитый процесс ничего не оставляет
+    захваченным). Фронт хранит отправленные, но не подтвержденные
+    апдейты. Упавший процесс перезапускается супервизором с новой
+    очередью (старая могла остаться заблокированной), и его
+    неподтвержденные апдейты отправляются заново: доставка «хотя бы
+    раз», апдейты, которые были в работе в момент падения, могут
+    обработаться повторно
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        target: Optional[Callable[..., None]] = None
+    ):
+        # target(index, queue, acked) — тело процесса, по умолчанию
+        # run_worker; тесты подставляют свое
+        self.target = target or run_worker
+        self.context = multiprocessing.get_context("spawn")
+        self.queues = [self.context.Queue() for _ in range(workers)]
+        self.acked: List[ctypes.c_longlong] = [
+            self.context.Value("q", 0, lock=False) for _ in range(workers)
+        ]
+        self.pending: List[Deque[ShardItem]] = [
+            deque() for _ in range(workers)
+        ]
+        self.sequences = [0] * workers
+        self.processes: List[Optional[BaseProcess]] = [None] * workers
+        self.restarts = 0
+        self.redelivered = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.queues)
+
+    async def start(self) -> None:
+        for index in range(len(self)):
+            self._spawn(index)
+        self._task = asyncio.create_task(self._supervise())
+
+    async def stop(self) -> None:
+        """Воркеры дорабатывают свои очереди и завершаются"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        loop = asyncio.get_running_loop()
+        for queue in self.queues:
+            queue.put(None)
+        for process in self.processes:
+            await loop.run_in_executor(None, process.join, STOP_TIMEOUT)
+            if process.is_alive():
+                logger.warning(f"Worker {process.name} did not stop in time")  # noqa: E501
+                process.terminate()
+
+    def route(self, key: int, update: Update) -> None:
+        index = shard_of(key, len(self))
+        self.sequences[index] += 1
+        item = (
+            self.sequences[index],
+            key,
+            update.model_dump_json(exclude_unset=True),
+        )
+        self.pending[index].append(item)
+        self.queues[index].put(item)
+        self._trim(index)
+
+    def _trim(self, index: int) -> None:
+        """Забывает апдейты, обработку которых воркер подтвердил"""
+        acked = self.acked[index].value
+        pending = self.pending[index]
+        while pending and pending[0][0] <= acked:
+            pending.popleft()
+
+    def _spawn(self, index: int) -> None:
+        process = self.context.Process(
+            target=self.target,
+            args=(index, self.queues[index], self.acked[index]),
+            name=f"bot-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        self.processes[index] = process
+
+    def _respawn(self, index: int) -> None:
+        self.restarts += 1
+        self.queues[index].cancel_join_thread()
+        self.queues[index].close()
+        self.queues[index] = self.context.Queue()
+
+        self._trim(index)
+        pending = self.pending[index]
+        for item in pending:
+            self.queues[index].put(item)
+        self.redelivered += len(pending)
+        if pending:
+            logger.warning(
+                f"Redelivering {len(pending)} unacknowledged updates "
+                f"to worker {index}"
+            )
+        self._spawn(index)
+
+    async def _supervise(self) -> None:
+        while True:
+            await asyncio.sleep(SUPERVISE_INTERVAL)
+            for index, process in enumerate(self.processes):
+                if process.is_alive():
+                    self._trim(index)
+                    continue
+                logger.error(
+                    f"Worker {process.name} exited with code "
+                    f"{process.exitcode}, restarting"
+                )
+                self._respawn(index)
+
+
+class ShardRouterMiddleware(BaseMiddleware):
+    """
+    Внешний middleware фронтового процесса: апдейт не обрабатывается
+    на месте, а уходит воркеру по хэшу user_id (или чата, если
+    пользователя нет). Все апдейты пользователя попадают в один
+    процесс — в том же порядке, с тем же FSM и кэшами
+    """
+
+    def __init__(self, pool: WorkerPool):
+        self.pool = pool
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        chat = data.get("event_chat")
+        key = user.id if user else chat.id if chat else 0
+        self.pool.route(key, event)
+
+
+def create_front_dispatcher(workers: int) -> Dispatcher:
+    """Dispatcher фронтового процесса: только прием и раздача апдейтов"""
+    pool = WorkerPool(workers)
+    dp = Dispatcher(worker_pool=pool)
+    dp.update.outer_middleware(ShardRouterMiddleware(pool))
+    dp.startup.register(pool.start)
+    dp.shutdown.register(pool.stop)
+    return dp
+
+
+def run_worker(
+    index: int,
+    queue: multiprocessing.Queue,
+    acked: ctypes.c_longlong
+) -> None:
+    # Ctrl+C получает вся группа процессов: останавливает фронт
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(serve_queue(index, queue, acked))
+
+
+async def serve_queue(
+    index: int,
+    queue: multiprocessing.Queue,
+    acked: ctypes.c_longlong
+) -> None:
+    """
+    Обработка апдейтов шарда: не больше WORKER_MAX_IN_FLIGHT задач
+    одновременно, апдейты одного пользователя — по очереди.
+    В acked публикуется номер, до которого обработано все
+    """
+    from bot import create_bot, create_dispatcher
+    from config import settings
+
+    bot = create_bot()
+    dp = await create_dispatcher()
+    if settings.METRICS_PORT:
+        dp["metrics_port"] = settings.METRICS_PORT + 1 + index
+    await dp.emit_startup(bot=bot, dispatcher=dp)
+    logger.info(f"Worker {index} started")
+
+    loop = asyncio.get_running_loop()
+    # Последняя задача каждого пользователя: следующий апдейт ждет ее
+    tails: Dict[int, asyncio.Task] = {}
+
+    limit = asyncio.Semaphore(settings.WORKER_MAX_IN_FLIGHT)
+    # Обработанные номера после первого пропуска: задачи разных
+    # пользователей завершаются не по порядку
+    done = set()
+
+    def release(key: int, sequence: int, task: asyncio.Task) -> None:
+        if tails.get(key) is task:
+            del tails[key]
+        limit.release()
+        done.add(sequence)
+        watermark = acked.value
+        while watermark + 1 in done:
+            watermark += 1
+            done.remove(watermark)
+        acked.value = watermark
+
+    try:
+        while True:
+            await limit.acquire()
+            item = await loop.run_in_executor(None, queue.get)
+            if item is None:
+                break
+            sequence, key, payload = item
+            if sequence <= acked.value:
+                # Повтор уже подтвержденного апдейта после перезапуска
+                limit.release()
+                continue
+            update = Update.model_validate_json(payload, context={"bot": bot})  # noqa: E501
+            task = asyncio.create_task(
+                handle_in_order(dp, bot, update, tails.get(key))
+            )
+            tails[key] = task
+            task.add_done_callback(
+                lambda t, key=key, sequence=sequence: release(key, sequence, t)  # noqa: E501
+            )
+        await asyncio.gather(*tails.values())
+    finally:
+        await dp.emit_shutdown(bot=bot, dispatcher=dp)
+        await bot.session.close()
+
+
+async def handle_in_order(
+    dp: Dispatcher,
+    bot: Bot,
+    update: Update,
+    previous: Optional[asyncio.Task]
+) -> None:
+    if previous is not None:
+        await asyncio.gather(previous, return_exceptions=True)
+    try:
+        await dp.feed_update(bot, update)
+    except Exception:
+        logger.exception(f"Update {update.update_id} failed")
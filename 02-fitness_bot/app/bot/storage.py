@@ -0,0 +1,189 @@
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Mapping, Optional, Set
+
+import aiosqlite
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import (
+    BaseStorage,
+    DefaultKeyBuilder,
+    StateType,
+    StorageKey,
+)
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fsm_storage (
+    key TEXT PRIMARY KEY,
+    state TEXT,
+    data TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_fsm_storage_expires_at
+ON fsm_storage (expires_at);
+"""
+
+UPSERT_RECORD = """
+INSERT INTO fsm_storage (key, state, data, expires_at) VALUES (?, ?, ?, ?)
+ON CONFLICT(key) DO UPDATE SET
+    state = excluded.state,
+    data = excluded.data,
+    expires_at = excluded.expires_at
+"""
+
+
+@dataclass
+class Record:
+    state: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    expires_at: float = 0.0
+
+    @property
+    def empty(self) -> bool:
+        return self.state is None and not self.data
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    FSM-хранилище в таблице SQLite с кэшем в памяти.
+    Чтения идут из кэша, изменения копятся и сбрасываются на диск
+    фоновой задачей раз в flush_interval секунд и при закрытии.
+    Незавершенные сценарии истекают через ttl секунд бездействия.
+
+    Кэш принадлежит процессу: ключи одного пользователя должны
+    обрабатываться одним процессом
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 24 * 3600,
+        flush_interval: float = 1.0
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.key_builder = DefaultKeyBuilder(with_destiny=True)
+        self.db: Optional[aiosqlite.Connection] = None
+        self._records: Dict[str, Record] = {}
+        self._dirty: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    async def open(self) -> "SQLiteStorage":
+        self.db = await aiosqlite.connect(self.path)
+        await self.db.execute("PRAGMA journal_mode=WAL")
+        await self.db.executescript(SCHEMA)
+        await self.db.commit()
+        self._task = asyncio.create_task(self._flush_periodically())
+        return self
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.db is not None:
+            await self.flush()
+            await self.db.close()
+            self.db = None
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:  # noqa: E501
+        record = await self._get_record(key)
+        record.state = state.state if isinstance(state, State) else state
+        self._touch(key, record)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._get_record(key)).state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:  # noqa: E501
+        record = await self._get_record(key)
+        record.data = dict(data)
+        self._touch(key, record)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return dict((await self._get_record(key)).data)
+
+    async def flush(self) -> None:
+        """Запись измененных ключей и удаление истекших одной транзакцией"""
+        now = time.time()
+        dirty, self._dirty = self._dirty, set()
+        upserts = []
+        deletes = []
+        for name in dirty:
+            record = self._records.get(name)
+            if record is None or record.empty:
+                deletes.append((name,))
+            else:
+                upserts.append((
+                    name,
+                    record.state,
+                    json.dumps(record.data, ensure_ascii=False),
+                    record.expires_at,
+                ))
+
+        try:
+            if upserts:
+                await self.db.executemany(UPSERT_RECORD, upserts)
+            if deletes:
+                await self.db.executemany(
+                    "DELETE FROM fsm_storage WHERE key = ?", deletes
+                )
+            await self.db.execute(
+                "DELETE FROM fsm_storage WHERE expires_at < ?", (now,)
+            )
+            await self.db.commit()
+        except Exception:
+            # Не теряем изменения: попробуем еще раз при следующем сбросе
+            self._dirty |= dirty
+            raise
+
+        for name in [
+            name for name, record in self._records.items()
+            if name not in self._dirty and record.expires_at < now
+        ]:
+            self._records.pop(name)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"FSM storage flush failed: {e}")
+
+    async def _get_record(self, key: StorageKey) -> Record:
+        name = self.key_builder.build(key)
+        record = self._records.get(name)
+        if record is not None:
+            if not record.empty and record.expires_at < time.time():
+                # Брошенный сценарий: состояние и данные сбрасываются
+                record.state, record.data = None, {}
+                self._dirty.add(name)
+            return record
+
+        async with self.db.execute(
+            "SELECT state, data, expires_at FROM fsm_storage "
+            "WHERE key = ? AND expires_at >= ?",
+            (name, time.time()),
+        ) as cursor:
+            row = await cursor.fetchone()
+
+        # Запись могла появиться, пока ждали диск
+        record = self._records.get(name)
+        if record is None:
+            # Пустая запись тоже кэшируется, чтобы не ходить на диск снова
+            record = Record(expires_at=time.time() + self.ttl)
+            if row is not None:
+                record = Record(row[0], json.loads(row[1]), row[2])
+            self._records[name] = record
+        return record
+
+    def _touch(self, key: StorageKey, record: Record) -> None:
+        record.expires_at = time.time() + self.ttl
+        self._dirty.add(self.key_builder.build(key))
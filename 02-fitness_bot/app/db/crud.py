@@ -1,24 +1,108 @@
 from app.utils.exceptions import ProfileError
 from app.schemas.profile import ProfileCreate, ProfileUpdate
 from app.db.models import User, WaterLog, FoodLog, WorkoutLog, DailyProgress
+from app.utils.cache import LRUCache
+from app.utils.dates import day_range, period_range
+from config import settings
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy import Date, event, select, and_, func, literal, union_all, update  # noqa: E501
 from datetime import datetime, date
 from typing import Optional, List, Dict, Any
 
 
+UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+PROGRESS_COUNTERS = (
+    "water_consumed",
+    "calories_consumed",
+    "calories_burned",
+    "workout_count",
+)
+
+
+# Значения колонок строк users; ключ — user_id
+user_cache = LRUCache(
+    max_size=settings.USER_CACHE_SIZE,
+    ttl=settings.USER_CACHE_TTL,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_written_users(session: Session) -> None:
+    """
+    Повторный сброс после коммита: пока транзакция с записью была
+    открыта, другой апдейт мог прочитать и закэшировать старую строку
+    """
+    for user_id in session.info.pop("written_users", ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_written_users(session: Session) -> None:
+    session.info.pop("written_users", None)
+
+
+def upsert_insert(session: AsyncSession, model):
+    """
+    INSERT с поддержкой ON CONFLICT для диалекта текущей сессии
+    """
+    dialect = session.get_bind().dialect.name
+    return UPSERT_INSERTS[dialect](model)
+
+
 class CRUDProfile:
     def __init__(self, session: AsyncSession):
         self.session = session
 
     async def get_user(self, user_id: int) -> Optional[User]:
         """
-        Получение пользователя по ID
+        Получение пользователя по ID для чтения.
+        Возвращает отсоединенный снимок, свой для каждого вызова;
+        пользователи, измененные в текущей транзакции, читаются из базы
+        и в кэш не попадают. Строка, загруженная во время сброса кэша,
+        тоже не кэшируется: она могла быть прочитана до коммита записи
+        """
+        written = self.session.info.get("written_users", ())
+        if user_id not in written:
+            values = user_cache.get(user_id)
+            if values is not None:
+                return User(**values)
+
+        generation = user_cache.generation
+        user = await self.load_user(user_id)
+        if user is None or user_id in written:
+            return user
+
+        values = {
+            column.key: getattr(user, column.key)
+            for column in User.__table__.columns
+        }
+        if user_cache.generation == generation:
+            user_cache.set(user_id, values)
+        return User(**values)
+
+    async def load_user(self, user_id: int) -> Optional[User]:
+        """
+        Загрузка строки пользователя в сессию (для изменения)
         """
         query = select(User).where(User.user_id == user_id)
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
 
+    def mark_user_written(self, user_id: int) -> None:
+        """
+        Сброс кэша при записи: до конца транзакции этот пользователь
+        читается только из базы, чтобы откат не оставил в кэше грязные
+        данные; после коммита кэш сбрасывается еще раз
+        """
+        self.session.info.setdefault("written_users", set()).add(user_id)
+        user_cache.invalidate(user_id)
+
     async def create_user(
         self,
         profile_data: ProfileCreate,
@@ -28,6 +112,7 @@ class CRUDProfile:
         Создание нового пользователя
         """
         try:
+            self.mark_user_written(user_id)
             db_user = User(
                 user_id=user_id,
                 weight=profile_data.weight,
@@ -35,15 +120,15 @@ class CRUDProfile:
                 age=profile_data.age,
                 activity_level=profile_data.activity_level,
                 city=profile_data.city,
+                calorie_goal=profile_data.calorie_goal,
+                water_goal=profile_data.water_goal,
                 created_at=datetime.utcnow(),
                 updated_at=datetime.utcnow()
             )
             self.session.add(db_user)
-            await self.session.commit()
-            await self.session.refresh(db_user)
+            await self.session.flush()
             return db_user
         except Exception as e:
-            await self.session.rollback()
             raise ProfileError(str(e))
 
     async def update_user(
@@ -55,7 +140,8 @@ class CRUDProfile:
         Обновление данных пользователя
         """
         try:
-            user = await self.get_user(user_id)
+            self.mark_user_written(user_id)
+            user = await self.load_user(user_id)
             if not user:
                 raise ProfileError(user_id)
 
@@ -64,11 +150,9 @@ class CRUDProfile:
                 setattr(user, field, value)
 
             user.updated_at = datetime.utcnow()
-            await self.session.commit()
-            await self.session.refresh(user)
+            await self.session.flush()
             return user
         except Exception as e:
-            await self.session.rollback()
             raise ProfileError(str(e))
 
     async def delete_user(self, user_id: int) -> bool:
@@ -76,14 +160,14 @@ class CRUDProfile:
         Удаление пользователя
         """
         try:
-            user = await self.get_user(user_id)
+            self.mark_user_written(user_id)
+            user = await self.load_user(user_id)
             if not user:
                 return False
             await self.session.delete(user)
-            await self.session.commit()
+            await self.session.flush()
             return True
         except Exception as e:
-            await self.session.rollback()
             raise ProfileError(f"Error deleting user: {str(e)}")
 
     async def log_water(
@@ -102,11 +186,14 @@ class CRUDProfile:
                 timestamp=timestamp or datetime.utcnow()
             )
             self.session.add(water_log)
-            await self.session.commit()
-            await self.session.refresh(water_log)
+            await self.increment_daily_progress(
+                user_id,
+                water_log.timestamp.date(),
+                water_consumed=amount
+            )
+            await self.session.flush()
             return water_log
         except Exception as e:
-            await self.session.rollback()
             raise Exception(f"Error logging water: {str(e)}")
 
     async def log_food(
@@ -129,11 +216,14 @@ class CRUDProfile:
                 timestamp=timestamp or datetime.utcnow()
             )
             self.session.add(food_log)
-            await self.session.commit()
-            await self.session.refresh(food_log)
+            await self.increment_daily_progress(
+                user_id,
+                food_log.timestamp.date(),
+                calories_consumed=calories
+            )
+            await self.session.flush()
             return food_log
         except Exception as e:
-            await self.session.rollback()
             raise Exception(f"Error logging food: {str(e)}")
 
     async def log_workout(
@@ -156,11 +246,15 @@ class CRUDProfile:
                 timestamp=timestamp or datetime.utcnow()
             )
             self.session.add(workout_log)
-            await self.session.commit()
-            await self.session.refresh(workout_log)
+            await self.increment_daily_progress(
+                user_id,
+                workout_log.timestamp.date(),
+                calories_burned=calories_burned,
+                workout_count=1
+            )
+            await self.session.flush()
             return workout_log
         except Exception as e:
-            await self.session.rollback()
             raise Exception(f"Error logging workout: {str(e)}")
 
     async def get_daily_logs(
@@ -172,14 +266,14 @@ class CRUDProfile:
         Получение всех логов за день
         """
         try:
-            start_datetime = datetime.combine(target_date, datetime.min.time())
-            end_datetime = datetime.combine(target_date, datetime.max.time())
+            start_datetime, end_datetime = day_range(target_date)
 
             # Получаем логи воды
             water_query = select(WaterLog).where(
                 and_(
                     WaterLog.user_id == user_id,
-                    WaterLog.timestamp.between(start_datetime, end_datetime)
+                    WaterLog.timestamp >= start_datetime,
+                    WaterLog.timestamp < end_datetime
                 )
             )
             water_result = await self.session.execute(water_query)
@@ -189,7 +283,8 @@ class CRUDProfile:
             food_query = select(FoodLog).where(
                 and_(
                     FoodLog.user_id == user_id,
-                    FoodLog.timestamp.between(start_datetime, end_datetime)
+                    FoodLog.timestamp >= start_datetime,
+                    FoodLog.timestamp < end_datetime
                 )
             )
             food_result = await self.session.execute(food_query)
@@ -199,7 +294,8 @@ class CRUDProfile:
             workout_query = select(WorkoutLog).where(
                 and_(
                     WorkoutLog.user_id == user_id,
-                    WorkoutLog.timestamp.between(start_datetime, end_datetime)
+                    WorkoutLog.timestamp >= start_datetime,
+                    WorkoutLog.timestamp < end_datetime
                 )
             )
             workout_result = await self.session.execute(workout_query)
@@ -220,25 +316,189 @@ class CRUDProfile:
         end_date: date
     ) -> List[Dict[str, Any]]:
         """
-        Получение логов за неделю
+        Суммы логов по дням за период одним запросом: UNION ALL трех
+        журналов по индексам (user_id, timestamp, ...) и GROUP BY даты.
+        Дни без логов в результат не попадают
         """
         try:
-            start_datetime = datetime.combine(start_date, datetime.min.time())
-            end_datetime = datetime.combine(end_date, datetime.max.time())
+            start_datetime, end_datetime = period_range(start_date, end_date)
+            logs = union_all(
+                select(
+                    func.date(WaterLog.timestamp, type_=Date).label("date"),
+                    WaterLog.amount.label("water_consumed"),
+                    literal(0).label("calories_consumed"),
+                    literal(0).label("calories_burned"),
+                    literal(0).label("workout_count")
+                ).where(
+                    WaterLog.user_id == user_id,
+                    WaterLog.timestamp >= start_datetime,
+                    WaterLog.timestamp < end_datetime
+                ),
+                select(
+                    func.date(FoodLog.timestamp, type_=Date),
+                    literal(0),
+                    FoodLog.calories,
+                    literal(0),
+                    literal(0)
+                ).where(
+                    FoodLog.user_id == user_id,
+                    FoodLog.timestamp >= start_datetime,
+                    FoodLog.timestamp < end_datetime
+                ),
+                select(
+                    func.date(WorkoutLog.timestamp, type_=Date),
+                    literal(0),
+                    literal(0),
+                    WorkoutLog.calories_burned,
+                    literal(1)
+                ).where(
+                    WorkoutLog.user_id == user_id,
+                    WorkoutLog.timestamp >= start_datetime,
+                    WorkoutLog.timestamp < end_datetime
+                )
+            ).subquery()
+
+            query = select(
+                logs.c.date,
+                *[
+                    func.sum(logs.c[counter]).label(counter)
+                    for counter in PROGRESS_COUNTERS
+                ]
+            ).group_by(logs.c.date).order_by(logs.c.date)
+            result = await self.session.execute(query)
+
+            return [dict(row._mapping) for row in result]
+        except Exception as e:
+            raise Exception(f"Error getting weekly logs: {str(e)}")
 
-            # Получаем все логи за период
-            daily_progress_query = select(DailyProgress).where(
-                and_(
-                    DailyProgress.user_id == user_id,
-                    DailyProgress.date.between(start_datetime, end_datetime)
+    async def get_daily_progress(
+        self,
+        user_id: int,
+        target_date: date
+    ) -> Optional[DailyProgress]:
+        """
+        Получение строки дневного прогресса
+        """
+        query = select(DailyProgress).where(
+            DailyProgress.user_id == user_id,
+            DailyProgress.date == target_date
+        )
+        result = await self.session.execute(query)
+        return result.scalar_one_or_none()
+
+    async def increment_daily_progress(
+        self,
+        user_id: int,
+        target_date: date,
+        water_consumed: int = 0,
+        calories_consumed: int = 0,
+        calories_burned: int = 0,
+        workout_count: int = 0
+    ) -> None:
+        """
+        Атомарное увеличение счетчиков дневного прогресса (upsert).
+        Не коммитит: выполняется в транзакции записи лога
+        """
+        now = datetime.utcnow()
+        insert = upsert_insert(self.session, DailyProgress).values(
+            user_id=user_id,
+            date=target_date,
+            water_consumed=water_consumed,
+            calories_consumed=calories_consumed,
+            calories_burned=calories_burned,
+            workout_count=workout_count,
+            steps=0,
+            created_at=now,
+            updated_at=now
+        )
+        query = insert.on_conflict_do_update(
+            index_elements=[DailyProgress.user_id, DailyProgress.date],
+            set_={
+                **{
+                    counter: getattr(DailyProgress, counter)
+                    + getattr(insert.excluded, counter)
+                    for counter in PROGRESS_COUNTERS
+                },
+                "updated_at": insert.excluded.updated_at,
+            }
+        )
+        await self.session.execute(query)
+
+    async def rebuild_daily_progress(
+        self,
+        user_id: Optional[int] = None
+    ) -> None:
+        """
+        Пересчет счетчиков дневного прогресса по сырым логам
+        """
+        try:
+            logs = union_all(
+                select(
+                    WaterLog.user_id,
+                    func.date(WaterLog.timestamp).label("date"),
+                    WaterLog.amount.label("water_consumed"),
+                    literal(0).label("calories_consumed"),
+                    literal(0).label("calories_burned"),
+                    literal(0).label("workout_count")
+                ),
+                select(
+                    FoodLog.user_id,
+                    func.date(FoodLog.timestamp),
+                    literal(0),
+                    FoodLog.calories,
+                    literal(0),
+                    literal(0)
+                ),
+                select(
+                    WorkoutLog.user_id,
+                    func.date(WorkoutLog.timestamp),
+                    literal(0),
+                    literal(0),
+                    WorkoutLog.calories_burned,
+                    literal(1)
                 )
+            ).subquery()
+
+            totals = select(
+                logs.c.user_id,
+                logs.c.date,
+                *[func.sum(logs.c[counter]) for counter in PROGRESS_COUNTERS],
+                literal(0),
+                literal(datetime.utcnow()),
+                literal(datetime.utcnow())
+            ).group_by(logs.c.user_id, logs.c.date)
+
+            reset = update(DailyProgress).values(
+                {counter: 0 for counter in PROGRESS_COUNTERS}
+            )
+            if user_id is not None:
+                totals = totals.where(logs.c.user_id == user_id)
+                reset = reset.where(DailyProgress.user_id == user_id)
+
+            insert = upsert_insert(self.session, DailyProgress).from_select(
+                [
+                    "user_id",
+                    "date",
+                    *PROGRESS_COUNTERS,
+                    "steps",
+                    "created_at",
+                    "updated_at",
+                ],
+                totals
+            )
+            query = insert.on_conflict_do_update(
+                index_elements=[DailyProgress.user_id, DailyProgress.date],
+                set_={
+                    counter: getattr(insert.excluded, counter)
+                    for counter in PROGRESS_COUNTERS
+                }
             )
-            result = await self.session.execute(daily_progress_query)
-            progress_logs = result.scalars().all()
 
-            return [log.to_dict() for log in progress_logs]
+            await self.session.execute(reset)
+            await self.session.execute(query)
+            await self.session.flush()
         except Exception as e:
-            raise Exception(f"Error getting weekly logs: {str(e)}")
+            raise Exception(f"Error rebuilding daily progress: {str(e)}")
 
     async def update_daily_progress(
         self,
@@ -267,11 +527,9 @@ class CRUDProfile:
                 progress.calories_consumed = calories_consumed
                 progress.calories_burned = calories_burned
 
-            await self.session.commit()
-            await self.session.refresh(progress)
+            await self.session.flush()
             return progress
         except Exception as e:
-            await self.session.rollback()
             raise Exception(f"Error updating daily progress: {str(e)}")
 
 
@@ -291,27 +549,17 @@ class CRUDWater:
             timestamp=timestamp
         )
         self.session.add(water_log)
-        await self.session.commit()
-        return water_log
-
-    async def get_daily_water_amount(
-        self,
-        user_id: int,
-        target_date: date = None
-    ) -> float:
-        if target_date is None:
-            target_date = date.today()
-
-        query = select(func.sum(WaterLog.amount)).where(
-            WaterLog.user_id == user_id,
-            func.date(WaterLog.timestamp) == target_date
+        await CRUDProfile(self.session).increment_daily_progress(
+            user_id,
+            timestamp.date(),
+            water_consumed=amount
         )
-        result = await self.session.execute(query)
-        return result.scalar() or 0
+        await self.session.flush()
+        return water_log
 
 
 class CRUDFood:
-    def init(self, session):
+    def __init__(self, session):
         self.session = session
 
     async def create_food_log(
@@ -330,7 +578,12 @@ class CRUDFood:
             timestamp=timestamp
         )
         self.session.add(food_log)
-        await self.session.commit()
+        await CRUDProfile(self.session).increment_daily_progress(
+            user_id,
+            timestamp.date(),
+            calories_consumed=calories
+        )
+        await self.session.flush()
         return food_log
 
     async def get_daily_calories(
@@ -341,14 +594,15 @@ class CRUDFood:
         if target_date is None:
             target_date = date.today()
 
+        start, end = day_range(target_date)
         query = select(func.sum(FoodLog.calories)).where(
             FoodLog.user_id == user_id,
-            func.date(FoodLog.timestamp) == target_date
+            FoodLog.timestamp >= start,
+            FoodLog.timestamp < end
         )
         result = await self.session.execute(query)
         return result.scalar() or 0
 
     async def get_user_calorie_goal(self, user_id: int) -> float:
-        query = select(User.calorie_goal).where(User.user_id == user_id)
-        result = await self.session.execute(query)
-        return result.scalar_one_or_none() or 2000  # default value
+        user = await CRUDProfile(self.session).get_user(user_id)
+        return user and user.calorie_goal or 2000  # default value
@@ -1,3 +1,4 @@
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     create_async_engine,
@@ -6,13 +7,22 @@ from sqlalchemy.ext.asyncio import (
 from sqlalchemy.orm import DeclarativeBase
 from typing import AsyncGenerator
 
+from app.db.instrumentation import instrument_engine
 from config import settings
 
 
+# Сколько ждать блокировку записи SQLite, прежде чем вернуть
+# "database is locked"; для других СУБД не задается
+connect_args = {}
+if make_url(settings.DATABASE_URL).get_backend_name() == "sqlite":
+    connect_args["timeout"] = settings.DB_BUSY_TIMEOUT
+
 engine = create_async_engine(
     settings.DATABASE_URL,
-    echo=True,
+    echo=settings.DB_ECHO,
+    connect_args=connect_args,
 )
+instrument_engine(engine)
 
 
 async_session_maker = async_sessionmaker(
@@ -21,6 +31,22 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# Свое соединение для LogWriter: хендлеры ждут коммита его пачки,
+# держа соединения основного пула, и на общем пуле он бы их не дождался
+writer_engine = create_async_engine(
+    settings.DATABASE_URL,
+    echo=settings.DB_ECHO,
+    connect_args=connect_args,
+    pool_size=1,
+    max_overflow=0,
+)
+
+writer_session_maker = async_sessionmaker(
+    writer_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
 
 class Base(DeclarativeBase):
     pass
@@ -38,11 +64,6 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
-async def get_session() -> AsyncSession:
-    async with async_session_maker() as session:
-        return session
-
-
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -0,0 +1,155 @@
+import logging
+import time
+from collections import Counter as Shapes
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.utils.metrics import Counter, Histogram
+
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_HANDLER = "unknown"
+
+UPDATE_QUERIES = Histogram(
+    "bot_update_db_queries",
+    "SQL statements executed per update",
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34),
+)
+DB_QUERIES = Counter(
+    "bot_db_queries_total",
+    "SQL statements executed, by handler",
+    ["handler"],
+)
+DB_SECONDS = Counter(
+    "bot_db_seconds_total",
+    "Time spent in SQL statements, by handler",
+    ["handler"],
+)
+DB_ROWS = Counter(
+    "bot_db_rows_total",
+    "Rows returned or affected by SQL statements, by handler",
+    ["handler"],
+)
+QUERY_BUDGET_EXCEEDED = Counter(
+    "bot_db_query_budget_exceeded_total",
+    "Updates that executed more statements than the budget",
+    ["handler"],
+)
+REPEATED_QUERIES = Counter(
+    "bot_db_repeated_queries_total",
+    "Updates that repeated one statement shape (N+1)",
+    ["handler"],
+)
+
+
+@dataclass
+class QueryStats:
+    update_id: int
+    handler: str = UNKNOWN_HANDLER
+    queries: int = 0
+    seconds: float = 0.0
+    rows: int = 0
+    shapes: Shapes = field(default_factory=Shapes)
+
+
+current_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_stats", default=None
+)
+
+
+def start_tracking(update_id: int) -> Token:
+    return current_stats.set(QueryStats(update_id))
+
+
+def finish_tracking(
+    token: Token,
+    budget: int,
+    repeat_threshold: int
+) -> QueryStats:
+    """
+    Закрывает учет апдейта: пишет метрики и предупреждает о
+    превышении бюджета запросов и повторах одного запроса
+    """
+    stats = current_stats.get()
+    current_stats.reset(token)
+
+    UPDATE_QUERIES.observe(stats.queries)
+    if not stats.queries:
+        return stats
+    DB_QUERIES.inc(stats.queries, handler=stats.handler)
+    DB_SECONDS.inc(stats.seconds, handler=stats.handler)
+    DB_ROWS.inc(stats.rows, handler=stats.handler)
+
+    if stats.queries > budget:
+        QUERY_BUDGET_EXCEEDED.inc(handler=stats.handler)
+        logger.warning(
+            f"Update {stats.update_id} ({stats.handler}) ran "
+            f"{stats.queries} queries, budget {budget}, "
+            f"{stats.seconds * 1000:.1f} ms, {stats.rows} rows"
+        )
+
+    shape, repeats = stats.shapes.most_common(1)[0]
+    if repeats >= repeat_threshold:
+        REPEATED_QUERIES.inc(handler=stats.handler)
+        logger.warning(
+            f"Update {stats.update_id} ({stats.handler}) repeated "
+            f"a query {repeats} times, possible N+1: "
+            f"{' '.join(shape.split())[:200]}"
+        )
+    return stats
+
+
+def before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    stats = current_stats.get()
+    if stats is None or context is None:
+        return statement, parameters
+
+    # Время начала живет в контексте выполнения: он отбрасывается и
+    # при ошибке запроса, ничего не оставляя на соединении из пула
+    context.query_started = time.perf_counter()
+    stats.shapes[statement] += 1
+    # Метка видна в логах и профилировщиках самой БД. Только хендлер:
+    # текст запроса не должен меняться от апдейта к апдейту, иначе
+    # кэши подготовленных запросов sqlite3 и asyncpg не работают.
+    # Номер апдейта есть в логах превышения бюджета и повторов
+    tagged = f"{statement} /* handler={stats.handler} */"
+    return tagged, parameters
+
+
+def after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    stats = current_stats.get()
+    started = getattr(context, "query_started", None)
+    if stats is None or started is None:
+        return
+
+    stats.queries += 1
+    stats.seconds += time.perf_counter() - started
+    rows = cursor.rowcount
+    if rows < 0:
+        # Для SELECT rowcount неизвестен, но async-адаптеры
+        # драйверов уже выбрали весь результат в буфер
+        rows = len(getattr(cursor, "_rows", ()))
+    stats.rows += rows
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        before_cursor_execute,
+        retval=True,
+    )
+    event.listen(
+        engine.sync_engine,
+        "after_cursor_execute",
+        after_cursor_execute,
+    )
@@ -7,6 +7,7 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     Date,
+    Index,
     UniqueConstraint,
 )
 from sqlalchemy.orm import relationship, Mapped, mapped_column
@@ -35,7 +36,7 @@ class BaseMixin:
         """Преобразование модели в словарь"""
         return {
             column.name: getattr(self, column.name)
-            for column in self.table.columns
+            for column in self.__table__.columns
         }
 
 
@@ -78,6 +79,15 @@ class WaterLog(BaseMixin, Base):
 
     user: Mapped["User"] = relationship(back_populates="water_logs")
 
+    __table_args__ = (
+        Index(
+            "ix_water_logs_user_id_timestamp",
+            "user_id",
+            "timestamp",
+            "amount",
+        ),
+    )
+
 
 class FoodLog(BaseMixin, Base):
     """Модель логирования приема пищи"""
@@ -95,6 +105,15 @@ class FoodLog(BaseMixin, Base):
 
     user: Mapped["User"] = relationship(back_populates="food_logs")
 
+    __table_args__ = (
+        Index(
+            "ix_food_logs_user_id_timestamp",
+            "user_id",
+            "timestamp",
+            "calories",
+        ),
+    )
+
 
 class WorkoutLog(BaseMixin, Base):
     __tablename__ = "workout_logs"
@@ -112,6 +131,15 @@ class WorkoutLog(BaseMixin, Base):
 
     user: Mapped["User"] = relationship(back_populates="workout_logs")
 
+    __table_args__ = (
+        Index(
+            "ix_workout_logs_user_id_timestamp",
+            "user_id",
+            "timestamp",
+            "calories_burned",
+        ),
+    )
+
 
 class DailyProgress(BaseMixin, Base):
     """Модель ежедневного прогресса"""
@@ -123,11 +151,12 @@ class DailyProgress(BaseMixin, Base):
     water_consumed: Mapped[int] = mapped_column(Integer, default=0)
     calories_consumed: Mapped[int] = mapped_column(Integer, default=0)
     calories_burned: Mapped[int] = mapped_column(Integer, default=0)
+    workout_count: Mapped[int] = mapped_column(Integer, default=0)
     steps: Mapped[int] = mapped_column(Integer, default=0)
     weight_measurement: Mapped[float] = mapped_column(Float, nullable=True)
 
     user: Mapped["User"] = relationship(back_populates="daily_progress")
 
-    table_args = (
+    __table_args__ = (
         UniqueConstraint('user_id', 'date', name='uq_user_date'),
     )
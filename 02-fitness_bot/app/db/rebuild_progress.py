@@ -0,0 +1,25 @@
+"""
+Пересчет таблицы daily_progress по сырым логам.
+
+Запуск: python -m app.db.rebuild_progress [--user-id ID]
+"""
+import argparse
+import asyncio
+
+from app.db.crud import CRUDProfile
+from app.db.database import async_session_maker, init_db
+
+
+async def rebuild(user_id: int = None) -> None:
+    await init_db()
+    async with async_session_maker() as session:
+        await CRUDProfile(session).rebuild_daily_progress(user_id)
+        await session.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args()
+
+    asyncio.run(rebuild(args.user_id))
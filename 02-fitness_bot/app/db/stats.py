@@ -0,0 +1,51 @@
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Select, and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import DailyProgress, User
+from app.schemas.progress import DailyStats
+
+
+def daily_stats_query(user_id: int, target_date: date) -> Select:
+    """
+    Цели пользователя и дневные счетчики одним запросом:
+    users LEFT JOIN daily_progress по уникальному (user_id, date)
+    """
+    return (
+        select(
+            func.coalesce(DailyProgress.water_consumed, 0).label("water_consumed"),  # noqa: E501
+            func.coalesce(DailyProgress.calories_consumed, 0).label("calories_consumed"),  # noqa: E501
+            func.coalesce(DailyProgress.calories_burned, 0).label("calories_burned"),  # noqa: E501
+            func.coalesce(DailyProgress.workout_count, 0).label("workout_count"),  # noqa: E501
+            User.water_goal,
+            User.calorie_goal
+        )
+        .outerjoin(
+            DailyProgress,
+            and_(
+                DailyProgress.user_id == User.user_id,
+                DailyProgress.date == target_date
+            )
+        )
+        .where(User.user_id == user_id)
+    )
+
+
+async def get_daily_stats(
+    session: AsyncSession,
+    user_id: int,
+    target_date: date = None
+) -> Optional[DailyStats]:
+    """
+    Статистика за день или None, если пользователь не найден
+    """
+    if target_date is None:
+        target_date = date.today()
+
+    result = await session.execute(daily_stats_query(user_id, target_date))
+    row = result.one_or_none()
+    if not row:
+        return None
+    return DailyStats(**row._mapping)
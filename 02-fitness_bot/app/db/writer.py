@@ -0,0 +1,181 @@
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.crud import CRUDProfile
+from app.db.database import Base
+from app.utils.exceptions import DatabaseError
+
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH = 500
+MAX_DELAY = 0.005
+# Дольше DB_BUSY_TIMEOUT: пачка может ждать блокировку записи SQLite
+WRITE_TIMEOUT = 60.0
+
+# (класс модели, значения колонок, приращения дневного прогресса, future)
+PendingLog = Tuple[type, Dict, Dict[str, int], asyncio.Future]
+
+
+class LogWriter:
+    """
+    Групповая запись логов воды, еды и тренировок: одна фоновая задача
+    собирает ожидающие вставки и пишет их одной транзакцией раз
+    в max_delay секунд или по max_batch строк. Вызывающий получает
+    строку после коммита своей пачки.
+
+    Пачка коммитится в своей транзакции, отдельно от сессии апдейта:
+    лог и другие записи хендлера не атомарны. Хендлеры логов пишут
+    только сам лог (и счетчики daily_progress, которые пишутся в той же
+    пачке); записи, которые должны быть атомарны с логом, делаются
+    через сессию апдейта без LogWriter
+    """
+
+    def __init__(
+        self,
+        session_pool: async_sessionmaker[AsyncSession],
+        max_batch: int = MAX_BATCH,
+        max_delay: float = MAX_DELAY,
+        timeout: float = WRITE_TIMEOUT
+    ):
+        self.session_pool = session_pool
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.queue: asyncio.Queue[Optional[PendingLog]] = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._batch: List[PendingLog] = []
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        self._task.add_done_callback(self._on_exit)
+
+    def _on_exit(self, task: asyncio.Task) -> None:
+        """
+        Задача остановлена или упала: незаписанные логи получают ошибку,
+        а не ждут коммита, которого не будет
+        """
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("LogWriter crashed", exc_info=task.exception())
+
+        pending = self._batch
+        self._batch = []
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is not None:
+                pending.append(item)
+        for *_, future in pending:
+            if not future.done():
+                future.set_exception(DatabaseError("LogWriter is not running"))
+
+    async def stop(self) -> None:
+        """Дописывает все, что уже в очереди, и останавливает задачу"""
+        task, self._task = self._task, None
+        if task is None:
+            return
+        if not task.done():
+            self.queue.put_nowait(None)
+        # Сбой задачи уже записан в лог в _on_exit
+        await asyncio.wait([task])
+
+    async def add(self, log: Base, **progress: int) -> Base:
+        """
+        Ставит строку лога в очередь и ждет коммита пачки.
+        progress — приращения счетчиков daily_progress
+        """
+        if not self.running:
+            raise DatabaseError("LogWriter is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        state = inspect(log)
+        values = {
+            attr.key: state.dict[attr.key]
+            for attr in state.mapper.column_attrs
+            if attr.key in state.dict
+        }
+        self.queue.put_nowait((type(log), values, progress, future))
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            # Строка еще может быть записана пачкой позже
+            raise DatabaseError(f"Log write timed out after {self.timeout} s")  # noqa: E501
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is None:
+                break
+
+            batch = self._batch = [item]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    item = self.queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self.queue.get(), timeout)  # noqa: E501
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._commit(batch)
+            self._batch = []
+
+    async def _commit(self, batch: List[PendingLog]) -> None:
+        try:
+            rows = await self._write(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                future = batch[0][3]
+                if not future.done():
+                    future.set_exception(DatabaseError(str(e)))
+                return
+
+            # Ищем виноватую запись: остальные пишутся по одной
+            logger.warning(f"Log batch of {len(batch)} failed: {e}")
+            for item in batch:
+                await self._commit([item])
+            return
+
+        for (*_, future), row in zip(batch, rows):
+            if not future.done():
+                future.set_result(row)
+
+    async def _write(self, batch: List[PendingLog]) -> List[Base]:
+        """
+        Вставка строк пачкой и одно приращение прогресса на
+        (пользователь, день) вместо одного на строку
+        """
+        rows = [model(**values) for model, values, _, _ in batch]
+        totals: Dict[tuple, Counter] = defaultdict(Counter)
+        for row, (_, _, progress, _) in zip(rows, batch):
+            totals[row.user_id, row.timestamp.date()].update(progress)
+
+        async with self.session_pool() as session:
+            session.add_all(rows)
+            crud = CRUDProfile(session)
+            for (user_id, target_date), counters in totals.items():
+                await crud.increment_daily_progress(
+                    user_id,
+                    target_date,
+                    **counters
+                )
+            await session.commit()
+        return rows
@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import time
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Set
+
+import aiosqlite
+
+from app.integrations.food_api import FoodAPI
+
+
+logger = logging.getLogger(__name__)
+
+SEARCH_LIMIT = 5
+FUZZY_CANDIDATES = 50
+FUZZY_THRESHOLD = 0.75
+# Верхняя граница диапазона name_key для поиска по префиксу
+PREFIX_END = "\U0010ffff"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL UNIQUE,
+    calories REAL NOT NULL,
+    proteins REAL NOT NULL DEFAULT 0,
+    fats REAL NOT NULL DEFAULT 0,
+    carbs REAL NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    name,
+    content='products',
+    content_rowid='id',
+    tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS products_ai AFTER INSERT ON products BEGIN
+    INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_ad AFTER DELETE ON products BEGIN
+    INSERT INTO products_fts(products_fts, rowid, name)
+    VALUES ('delete', old.id, old.name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_au AFTER UPDATE OF name ON products BEGIN
+    INSERT INTO products_fts(products_fts, rowid, name)
+    VALUES ('delete', old.id, old.name);
+    INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name);
+END;
+"""
+
+UPSERT_PRODUCT = """
+INSERT INTO products (name, name_key, calories, proteins, fats, carbs, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(name_key) DO UPDATE SET
+    name = excluded.name,
+    calories = excluded.calories,
+    proteins = excluded.proteins,
+    fats = excluded.fats,
+    carbs = excluded.carbs,
+    updated_at = excluded.updated_at
+"""  # noqa: E501
+
+SELECT_COLUMNS = (
+    "p.name, p.calories, p.proteins, p.fats, p.carbs, p.updated_at"
+)
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(name.split()).casefold()
+
+
+def fts_phrase(text: str) -> str:
+    """Строка как одна фраза FTS5: кавычки внутри удваиваются"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def trigrams(text: str) -> List[str]:
+    return sorted({text[i:i + 3] for i in range(len(text) - 2)})
+
+
+def similarity(query: str, name: str) -> float:
+    """Лучшее совпадение запроса с началом названия или одним из слов"""
+    name = normalize_name(name)
+    candidates = [name[:len(query)], *name.split()]
+    return max(
+        SequenceMatcher(None, query, candidate).ratio()
+        for candidate in candidates
+    )
+
+
+def product_row(item: Dict, updated_at: float) -> tuple:
+    return (
+        item['name'],
+        normalize_name(item['name']),
+        float(item['calories']),
+        float(item.get('proteins') or 0),
+        float(item.get('fats') or 0),
+        float(item.get('carbs') or 0),
+        updated_at,
+    )
+
+
+class FoodCatalog:
+    """
+    Локальный каталог продуктов на SQLite FTS5 (trigram) перед
+    OpenFoodFacts: поиск сначала по каталогу, API — только при промахе.
+    Устаревшие найденные записи обновляются из API в фоне
+    """
+
+    def __init__(
+        self,
+        path: str,
+        food_api: Optional[FoodAPI] = None,
+        ttl: float = 7 * 24 * 3600
+    ):
+        self.path = path
+        self.food_api = food_api
+        self.ttl = ttl
+        self.db: Optional[aiosqlite.Connection] = None
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def open(self) -> "FoodCatalog":
+        self.db = await aiosqlite.connect(self.path)
+        await self.db.execute("PRAGMA journal_mode=WAL")
+        await self.db.execute("PRAGMA synchronous=NORMAL")
+        await self.db.executescript(SCHEMA)
+        await self.db.commit()
+        return self
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.db is not None:
+            await self.db.close()
+            self.db = None
+
+    async def search(self, query: str) -> List[Dict]:
+        """
+        Поиск продукта: каталог, затем API с сохранением результата
+        """
+        key = normalize_name(query)
+        if not key:
+            return []
+
+        rows = await self.search_local(key)
+        if rows:
+            if min(row['updated_at'] for row in rows) < time.time() - self.ttl:  # noqa: E501
+                self.schedule_refresh(query)
+            return [self.to_item(row) for row in rows]
+
+        if self.food_api is None:
+            return []
+
+        items = await self.food_api.search_food(query)
+        await self.upsert(items)
+        return items
+
+    async def search_local(self, key: str) -> List[Dict]:
+        """
+        Префикс по индексу name_key, затем подстрока через trigram-индекс;
+        если пусто — нечеткий поиск по пересечению триграмм
+        с проверкой сходства
+        """
+        rows = await self.fetch(
+            f"SELECT {SELECT_COLUMNS} FROM products p "
+            "WHERE p.name_key >= ? AND p.name_key < ? "
+            "ORDER BY p.name_key LIMIT ?",
+            (key, key + PREFIX_END, SEARCH_LIMIT),
+        )
+        if len(rows) == SEARCH_LIMIT or len(key) < 3:
+            return rows
+
+        # Без ORDER BY rank FTS5 отдает первые совпадения, не ранжируя все
+        rows += await self.fetch(
+            f"SELECT {SELECT_COLUMNS} FROM products_fts "
+            "JOIN products p ON p.id = products_fts.rowid "
+            "WHERE products_fts MATCH ? AND NOT "
+            "(p.name_key >= ? AND p.name_key < ?) LIMIT ?",
+            (
+                fts_phrase(key),
+                key,
+                key + PREFIX_END,
+                SEARCH_LIMIT - len(rows),
+            ),
+        )
+        if rows:
+            return rows
+
+        candidates = await self.fetch(
+            f"SELECT {SELECT_COLUMNS} FROM products_fts "
+            "JOIN products p ON p.id = products_fts.rowid "
+            "WHERE products_fts MATCH ? ORDER BY rank LIMIT ?",
+            (
+                " OR ".join(fts_phrase(gram) for gram in trigrams(key)),
+                FUZZY_CANDIDATES,
+            ),
+        )
+        scored = [
+            (similarity(key, row['name']), row) for row in candidates
+        ]
+        scored = [item for item in scored if item[0] >= FUZZY_THRESHOLD]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [row for _, row in scored[:SEARCH_LIMIT]]
+
+    async def fetch(self, sql: str, params: tuple) -> List[Dict]:
+        async with self.db.execute(sql, params) as cursor:
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in await cursor.fetchall()]  # noqa: E501
+
+    async def upsert(self, items: Iterable[Dict]) -> None:
+        now = time.time()
+        rows = [
+            product_row(item, now)
+            for item in items
+            if item.get('name') and item.get('calories')
+        ]
+        if rows:
+            await self.db.executemany(UPSERT_PRODUCT, rows)
+            await self.db.commit()
+
+    def schedule_refresh(self, query: str) -> None:
+        key = normalize_name(query)
+        if self.food_api is None or key in self._refreshing:
+            return
+
+        self._refreshing.add(key)
+        task = asyncio.create_task(self.refresh(query))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(lambda _: self._refreshing.discard(key))
+
+    async def refresh(self, query: str) -> None:
+        try:
+            await self.upsert(await self.food_api.search_food(query))
+        except Exception as e:
+            logger.warning(f"Food catalog refresh failed for {query!r}: {e}")
+
+    @staticmethod
+    def to_item(row: Dict) -> Dict:
+        return {
+            'name': row['name'],
+            'calories': row['calories'],
+            'serving_size': 100,
+            'proteins': row['proteins'],
+            'fats': row['fats'],
+            'carbs': row['carbs'],
+        }
@@ -0,0 +1,172 @@
+"""
+Потоковый импорт выгрузки OpenFoodFacts (CSV/JSONL, можно .gz)
+в локальный каталог продуктов.
+
+Запуск: python -m app.integrations.food_import DUMP [--catalog PATH]
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import logging
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, Iterator, Optional
+
+from app.integrations.food_catalog import SCHEMA, UPSERT_PRODUCT, product_row
+from config import settings
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50_000
+
+# Поля, которые FoodAPI.search_food берет из nutriments
+NUTRIENT_FIELDS = {
+    'calories': 'energy-kcal_100g',
+    'proteins': 'proteins_100g',
+    'fats': 'fat_100g',
+    'carbs': 'carbohydrates_100g',
+}
+
+
+@contextmanager
+def open_dump(path: str) -> Iterator[io.TextIOBase]:
+    """Текстовый поток выгрузки; "-" — stdin, который не закрывается"""
+    if path == "-":
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")  # noqa: E501
+        try:
+            yield stream
+        finally:
+            stream.detach()
+        return
+
+    if path.endswith(".gz"):
+        stream = gzip.open(path, "rt", encoding="utf-8", newline="")
+    else:
+        stream = open(path, encoding="utf-8", newline="")
+    with stream:
+        yield stream
+
+
+def to_float(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def make_item(name: Optional[str], nutrients: Dict) -> Optional[Dict]:
+    """Продукт в формате FoodAPI.search_food или None, если он неполный"""
+    name = (name or "").strip()
+    if not name:
+        return None
+
+    item = {
+        field: to_float(nutrients.get(key))
+        for field, key in NUTRIENT_FIELDS.items()
+    }
+    if not item['calories']:
+        return None
+    item['name'] = name
+    return item
+
+
+def read_csv(stream: io.TextIOBase) -> Iterator[Dict]:
+    """CSV-выгрузка OpenFoodFacts: табуляция как разделитель"""
+    csv.field_size_limit(sys.maxsize)
+    for row in csv.DictReader(stream, delimiter="\t", quoting=csv.QUOTE_NONE):
+        item = make_item(row.get('product_name'), row)
+        if item:
+            yield item
+
+
+def read_jsonl(stream: io.TextIOBase) -> Iterator[Dict]:
+    """JSONL-выгрузка: строки без калорийности отбрасываются до разбора"""
+    for line in stream:
+        if '"energy-kcal_100g"' not in line:
+            continue
+        try:
+            product = json.loads(line)
+        except ValueError:
+            continue
+        item = make_item(
+            product.get('product_name'),
+            product.get('nutriments') or {}
+        )
+        if item:
+            yield item
+
+
+def read_dump(path: str, stream: io.TextIOBase) -> Iterator[Dict]:
+    name = path.removesuffix(".gz")
+    if name.endswith((".jsonl", ".json")):
+        return read_jsonl(stream)
+    return read_csv(stream)
+
+
+def import_dump(
+    path: str,
+    catalog_path: str = settings.FOOD_CATALOG_PATH,
+    batch_size: int = BATCH_SIZE
+) -> int:
+    """
+    Потоковый импорт выгрузки в каталог продуктов пачками по batch_size
+    в отдельных транзакциях. Триггеры FTS на время загрузки снимаются,
+    индекс перестраивается один раз в конце
+    """
+    db = sqlite3.connect(catalog_path, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=OFF")
+    db.execute("PRAGMA temp_store=MEMORY")
+    db.execute("PRAGMA cache_size=-65536")
+    db.executescript(SCHEMA)
+    db.executescript(
+        "DROP TRIGGER IF EXISTS products_ai;"
+        "DROP TRIGGER IF EXISTS products_ad;"
+        "DROP TRIGGER IF EXISTS products_au;"
+    )
+
+    total = 0
+    started = time.perf_counter()
+    try:
+        with open_dump(path) as stream:
+            items = read_dump(path, stream)
+            while batch := list(islice(items, batch_size)):
+                now = time.time()
+                db.execute("BEGIN")
+                db.executemany(
+                    UPSERT_PRODUCT,
+                    (product_row(item, now) for item in batch)
+                )
+                db.execute("COMMIT")
+                total += len(batch)
+                logger.info(
+                    f"Imported {total} products "
+                    f"({total / (time.perf_counter() - started):.0f}/s)"
+                )
+    finally:
+        if db.in_transaction:
+            db.execute("ROLLBACK")
+        db.execute("INSERT INTO products_fts(products_fts) VALUES('rebuild')")
+        db.executescript(SCHEMA)
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.close()
+
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("dump", help="путь к выгрузке или - для stdin")
+    parser.add_argument("--catalog", default=settings.FOOD_CATALOG_PATH)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    total = import_dump(args.dump, args.catalog, args.batch_size)
+    logger.info(f"Done: {total} products in {args.catalog}")
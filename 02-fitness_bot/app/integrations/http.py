@@ -0,0 +1,28 @@
+import aiohttp
+
+
+# Ограничения пула соединений, общего для всех внешних API
+CONNECTION_LIMIT = 100
+CONNECTION_LIMIT_PER_HOST = 10
+KEEPALIVE_TIMEOUT = 30
+DNS_CACHE_TTL = 300
+
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=3, sock_read=7)
+
+
+def create_http_session() -> aiohttp.ClientSession:
+    """
+    HTTP-клиент с keep-alive пулом соединений и таймаутами.
+    Создается один раз при старте бота и закрывается при остановке
+    """
+    connector = aiohttp.TCPConnector(
+        limit=CONNECTION_LIMIT,
+        limit_per_host=CONNECTION_LIMIT_PER_HOST,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=DNS_CACHE_TTL,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=REQUEST_TIMEOUT,
+        raise_for_status=False,
+    )
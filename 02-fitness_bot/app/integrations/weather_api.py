@@ -1,32 +1,49 @@
 import aiohttp
 
 from config import settings
+from app.utils.cache import TTLCache
 from app.utils.exceptions import ExternalServiceError
 
 
+def normalize_city(city: str) -> str:
+    """Ключ кэша: регистр и лишние пробелы в названии не важны"""
+    return " ".join(city.split()).casefold()
+
+
 class WeatherAPI:
-    def __init__(self):
+    # Общий для всех экземпляров: сервисы создаются на каждый апдейт
+    temperature_cache = TTLCache(ttl=settings.WEATHER_CACHE_TTL)
+
+    def __init__(self, http_session: aiohttp.ClientSession):
+        self.http_session = http_session
         self.api_key = settings.WEATHER_API_KEY
-        self.base_url = "http://api.openweathermap.org/data/2.5/weather"
+        self.base_url = settings.WEATHER_API_URL
 
     async def get_temperature(self, city: str) -> float:
+        """Температура в городе с кэшированием на WEATHER_CACHE_TTL секунд"""
+        city = " ".join(city.split())
+        return await self.temperature_cache.get_or_load(
+            normalize_city(city),
+            lambda: self.fetch_temperature(city)
+        )
+
+    async def fetch_temperature(self, city: str) -> float:
         try:
-            async with aiohttp.ClientSession() as session:
-                params = {
-                    'q': city,
-                    'appid': self.api_key,
-                    'units': 'metric'
-                }
-
-                async with session.get(self.base_url, params=params) as response:  # noqa E501
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise ExternalServiceError(
-                            f"Не удалось получить температуру: {error_text}"
-                        )
-
-                    data = await response.json()
-                    return data['main']['temp']
+            params = {
+                'q': city,
+                'appid': self.api_key,
+                'units': 'metric'
+            }
+
+            async with self.http_session.get(self.base_url, params=params) as response:  # noqa E501
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise ExternalServiceError(
+                        f"Не удалось получить температуру: {error_text}"
+                    )
+
+                data = await response.json()
+                return data['main']['temp']
 
         except aiohttp.ClientError as e:
             raise ExternalServiceError(f"Ошибка соединения с API: {str(e)}")
@@ -35,8 +52,3 @@ class WeatherAPI:
                 f"Неверный формат ответа от API: {str(e)}")
         except Exception as e:
             raise ExternalServiceError(f"Неизвестная ошибка: {str(e)}")
-
-    async def close(self):
-        """Метод для корректного закрытия сессии"""
-        if hasattr(self, 'session'):
-            await self.session.close()
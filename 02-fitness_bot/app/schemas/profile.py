@@ -73,6 +73,7 @@ class DailyProgress(BaseModel):
     water_consumed: float = Field(default=0, ge=0)
     calories_consumed: float = Field(default=0, ge=0)
     calories_burned: float = Field(default=0, ge=0)
+    workout_count: int = Field(default=0, ge=0)
     water_goal: float
     calorie_goal: float
     date: datetime
@@ -120,6 +121,11 @@ class WeeklyStats(BaseModel):
             return 0
         return sum(day.calories_burned for day in self.daily_stats) / len(self.daily_stats)  # noqa E501
 
+    @property
+    def total_workouts(self) -> int:
+        """Количество тренировок за период"""
+        return sum(day.workout_count for day in self.daily_stats)
+
 
 class ProfileResponse(BaseModel):
     """Модель ответа с данными профиля"""
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel, Field
 
 
@@ -9,3 +10,13 @@ class DailyProgressResponse(BaseModel):
     calories_burned: int = Field(0, description="Сожженные калории")
     calories_remaining: int = Field(0, description="Оставшиеся калории")
     workout_count: int = Field(0, description="Количество тренировок")
+
+
+class DailyStats(BaseModel):
+    """Агрегированная статистика пользователя за день"""
+    water_consumed: int = Field(0, description="Количество потребленной воды (мл)")  # noqa: E501
+    calories_consumed: int = Field(0, description="Потребленные калории")
+    calories_burned: int = Field(0, description="Сожженные калории")
+    workout_count: int = Field(0, description="Количество тренировок")
+    water_goal: Optional[int] = Field(None, description="Целевое количество воды (мл)")  # noqa: E501
+    calorie_goal: Optional[int] = Field(None, description="Целевые калории")
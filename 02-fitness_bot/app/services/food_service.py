@@ -1,16 +1,29 @@
-from datetime import datetime, time
-from typing import Tuple
-from sqlalchemy import select, and_, func
+from datetime import datetime
+from typing import Optional, Tuple
+
+from aiohttp import ClientSession
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.models import User, FoodLog
+from app.db.crud import CRUDProfile
+from app.db.models import FoodLog
+from app.db.stats import get_daily_stats
+from app.db.writer import LogWriter
 from app.utils.exceptions import ValidationError
 from app.integrations.food_api import FoodAPI
+from app.integrations.food_catalog import FoodCatalog
 
 
 class FoodService:
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self,
+        session: AsyncSession,
+        http_session: ClientSession,
+        food_catalog: Optional[FoodCatalog] = None,
+        log_writer: Optional[LogWriter] = None
+    ):
         self.session = session
-        self.food_api = FoodAPI()
+        self.food_api = FoodAPI(http_session)
+        self.food_catalog = food_catalog
+        self.log_writer = log_writer
 
     async def log_food(
         self,
@@ -24,10 +37,7 @@ class FoodService:
     ) -> None:
         """Логирование приема пищи"""
         # Проверяем существование пользователя
-        user = await self.session.execute(
-            select(User).where(User.user_id == user_id)
-        )
-        user = user.scalar_one_or_none()
+        user = await CRUDProfile(self.session).get_user(user_id)
 
         if not user:
             raise ValidationError("Пользователь не найден")
@@ -42,11 +52,22 @@ class FoodService:
                 carbs=carbs,
                 timestamp=datetime.utcnow()
             )
+            if self.log_writer is not None:
+                await self.log_writer.add(
+                    food_log,
+                    calories_consumed=food_log.calories
+                )
+                return
+
             self.session.add(food_log)
-            await self.session.commit()
+            await CRUDProfile(self.session).increment_daily_progress(
+                user_id,
+                food_log.timestamp.date(),
+                calories_consumed=food_log.calories
+            )
+            await self.session.flush()
 
         except Exception as e:
-            await self.session.rollback()
             raise ValidationError(
                 f"Не удалось сохранить информацию о приеме пищи: {str(e)}")
 
@@ -56,40 +77,26 @@ class FoodService:
         Возвращает (потребленные калории, целевые калории)
         """
         try:
-            # Получаем профиль пользователя для целевых калорий
-            user = await self.session.execute(
-                select(User).where(User.user_id == user_id)
-            )
-            user = user.scalar_one_or_none()
+            stats = await get_daily_stats(self.session, user_id)
 
-            if not user:
+            if not stats:
                 raise ValidationError("Пользователь не найден")
 
-            # Получаем сумму калорий за текущий день
-            today = datetime.now().date()
-            today_start = datetime.combine(today, time.min)
-            today_end = datetime.combine(today, time.max)
-
-            result = await self.session.execute(
-                select(func.sum(FoodLog.calories)).where(
-                    and_(
-                        FoodLog.user_id == user_id,
-                        FoodLog.timestamp >= today_start,
-                        FoodLog.timestamp <= today_end
-                    )
-                )
+            return (
+                float(stats.calories_consumed),
+                float(stats.calorie_goal or 2000)
             )
 
-            consumed_calories = result.scalar() or 0
-            return float(consumed_calories), float(user.calorie_goal or 2000)
-
         except Exception as e:
             raise ValidationError(f"Ошибка при получении прогресса: {str(e)}")
 
     async def search_food(self, query: str) -> list:
-        """Поиск продукта через API"""
+        """Поиск продукта: локальный каталог, если подключен, иначе API"""
         try:
-            food_items = await self.food_api.search_food(query)
+            if self.food_catalog is not None:
+                food_items = await self.food_catalog.search(query)
+            else:
+                food_items = await self.food_api.search_food(query)
             if not food_items:
                 return []
             return food_items
@@ -1,29 +1,27 @@
 from typing import Dict, Any, Optional, Tuple
 from datetime import date
 
+from aiohttp import ClientSession
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from app.db.crud import CRUDProfile
+from app.db.stats import get_daily_stats
 from app.core.calculations import calculate_calorie_goal, calculate_water_norm
 from app.integrations.weather_api import WeatherAPI
 from app.schemas.profile import UserProfile, ProfileCreate, ProfileUpdate
 from app.utils.exceptions import ProfileError
-from app.db.database import get_session
 
 
 class ProfileService:
-    def __init__(self):
-        self.weather_api = WeatherAPI()
-
-    async def _get_crud(self) -> CRUDProfile:
-        session = await get_session()
-        return CRUDProfile(session)
+    def __init__(self, session: AsyncSession, http_session: ClientSession):
+        self.crud = CRUDProfile(session)
+        self.weather_api = WeatherAPI(http_session)
 
     async def create_or_update_profile(
         self,
         user_data: Dict[str, Any]
     ) -> bool:
         try:
-            crud = await self._get_crud()
-
             temperature = await self.weather_api.get_temperature(user_data['city'])  # noqa: E501
 
             calorie_goal = calculate_calorie_goal(
@@ -47,14 +45,14 @@ class ProfileService:
             }
 
             # Проверяем существование пользователя
-            user = await crud.get_user(user_data['user_id'])
+            user = await self.crud.get_user(user_data['user_id'])
 
             if user:
                 profile_update = ProfileUpdate(**profile_data)
-                await crud.update_user(user_data['user_id'], profile_update)
+                await self.crud.update_user(user_data['user_id'], profile_update)  # noqa: E501
             else:
                 profile_create = ProfileCreate(**profile_data)
-                await crud.create_user(profile_create, user_data['user_id'])
+                await self.crud.create_user(profile_create, user_data['user_id'])  # noqa: E501
 
             return True
 
@@ -64,8 +62,7 @@ class ProfileService:
     async def get_profile(self, user_id: int) -> Optional[UserProfile]:
         """Получение профиля пользователя"""
         try:
-            crud = await self._get_crud()
-            user = await crud.get_user(user_id)
+            user = await self.crud.get_user(user_id)
 
             if not user:
                 return None
@@ -99,18 +96,15 @@ class ProfileService:
     ) -> Tuple[float, float, float]:
         """Получение прогресса за день"""
         try:
-            crud = await self._get_crud()
-
-            if target_date is None:
-                target_date = date.today()
-
-            logs = await crud.get_daily_logs(user_id, target_date)
-
-            water_consumed = sum(log.amount for log in logs['water_logs'])
-            calories_consumed = sum(log.calories for log in logs['food_logs'])
-            calories_burned = sum(log.calories_burned for log in logs['workout_logs'])  # noqa: E501
-
-            return water_consumed, calories_consumed, calories_burned
+            stats = await get_daily_stats(self.crud.session, user_id, target_date)  # noqa: E501
+            if not stats:
+                return 0, 0, 0
+
+            return (
+                stats.water_consumed,
+                stats.calories_consumed,
+                stats.calories_burned
+            )
 
         except Exception as e:
             raise ProfileError(f"Error getting daily progress: {str(e)}")
@@ -1,8 +1,26 @@
-from datetime import datetime, time
-from sqlalchemy import select, func, and_
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.models import User, WaterLog, FoodLog, WorkoutLog
+from app.db.crud import CRUDProfile
+from app.db.stats import get_daily_stats
+from app.schemas.profile import DailyProgress, WeeklyStats
 from app.schemas.progress import DailyProgressResponse
+from app.utils.cache import LRUCache
+from app.utils.dates import week_start
+from config import settings
+
+
+# Суммы по дням закрытых недель, ключ — (user_id, понедельник недели).
+# Логи еды и тренировок помечаются utcnow, а недели считаются по
+# локальной дате: запись, сделанная рано утром в понедельник, еще
+# попадает в прошлую неделю. Поэтому неделя закрыта (и кэшируется)
+# только через день после воскресенья
+CLOSED_WEEK_MARGIN = timedelta(days=1)
+closed_weeks_cache = LRUCache(
+    max_size=settings.STATS_CACHE_SIZE,
+    ttl=settings.STATS_CACHE_TTL,
+)
 
 
 class ProgressService:
@@ -11,75 +29,84 @@ class ProgressService:
 
     async def get_daily_progress(self, user_id: int) -> DailyProgressResponse:
         """Получение прогресса за текущий день"""
-        today = datetime.now().date()
-        today_start = datetime.combine(today, time.min)
-        today_end = datetime.combine(today, time.max)
+        stats = await get_daily_stats(self.session, user_id)
+        if not stats:
+            raise ValueError("Пользователь не найден")
+
+        # Рассчитываем оставшиеся калории
+        calories_remaining = stats.calorie_goal - stats.calories_consumed + stats.calories_burned  # noqa: E501
 
-        # Получаем данные пользователя
-        user = await self.session.execute(
-            select(User).where(User.user_id == user_id)
+        return DailyProgressResponse(
+            water_consumed=stats.water_consumed,
+            water_target=stats.water_goal,
+            calories_consumed=stats.calories_consumed,
+            calories_target=stats.calorie_goal,
+            calories_burned=stats.calories_burned,
+            calories_remaining=calories_remaining,
+            workout_count=stats.workout_count
         )
-        user = user.scalar_one_or_none()
+
+    async def get_period_stats(self, user_id: int, days: int) -> WeeklyStats:
+        """
+        Статистика по дням за последние days дней, включая сегодня.
+        Закрытые недели берутся из кэша, остальные — одним запросом
+        """
+        crud = CRUDProfile(self.session)
+        user = await crud.get_user(user_id)
         if not user:
             raise ValueError("Пользователь не найден")
 
-        # Получаем потребление воды
-        water_result = await self.session.execute(
-            select(func.sum(WaterLog.amount)).where(
-                and_(
-                    WaterLog.user_id == user_id,
-                    WaterLog.timestamp >= today_start,
-                    WaterLog.timestamp <= today_end
-                )
-            )
-        )
-        water_consumed = water_result.scalar() or 0
-
-        # Получаем потребленные калории
-        calories_result = await self.session.execute(
-            select(func.sum(FoodLog.calories)).where(
-                and_(
-                    FoodLog.user_id == user_id,
-                    FoodLog.timestamp >= today_start,
-                    FoodLog.timestamp <= today_end
-                )
-            )
-        )
-        calories_consumed = calories_result.scalar() or 0
+        end_date = date.today()
+        start_date = end_date - timedelta(days=days - 1)
+        current_week = week_start(end_date)
+        # Недели с этого понедельника еще могут измениться
+        open_week = week_start(end_date - CLOSED_WEEK_MARGIN)
 
-        # Получаем сожженные калории
-        burned_result = await self.session.execute(
-            select(func.sum(WorkoutLog.calories_burned)).where(
-                and_(
-                    WorkoutLog.user_id == user_id,
-                    WorkoutLog.timestamp >= today_start,
-                    WorkoutLog.timestamp <= today_end
-                )
-            )
-        )
-        calories_burned = burned_result.scalar() or 0
+        totals: Dict[date, Dict[str, Any]] = {}
+        missing: List[date] = []
+        monday = week_start(start_date)
+        while monday <= current_week:
+            cached = None
+            if monday < open_week:
+                cached = closed_weeks_cache.get((user_id, monday))
+            if cached is None:
+                missing.append(monday)
+            else:
+                totals.update(cached)
+            monday += timedelta(days=7)
 
-        # Получаем количество тренировок
-        workout_count_result = await self.session.execute(
-            select(func.count(WorkoutLog.id)).where(
-                and_(
-                    WorkoutLog.user_id == user_id,
-                    WorkoutLog.timestamp >= today_start,
-                    WorkoutLog.timestamp <= today_end
-                )
+        if missing:
+            rows = await crud.get_weekly_logs(
+                user_id,
+                missing[0],
+                min(missing[-1] + timedelta(days=6), end_date)
             )
-        )
-        workout_count = workout_count_result.scalar() or 0
+            fetched = {row["date"]: row for row in rows}
+            totals.update(fetched)
+            for monday in missing:
+                if monday >= open_week:
+                    continue
+                closed_weeks_cache.set((user_id, monday), {
+                    day: row for day, row in fetched.items()
+                    if monday <= day < monday + timedelta(days=7)
+                })
 
-        # Рассчитываем оставшиеся калории
-        calories_remaining = user.calorie_goal - calories_consumed + calories_burned  # noqa: E501
+        daily_stats = []
+        for offset in range(days):
+            day = start_date + timedelta(days=offset)
+            row = totals.get(day, {})
+            daily_stats.append(DailyProgress(
+                date=datetime.combine(day, time.min),
+                water_consumed=row.get("water_consumed", 0),
+                calories_consumed=row.get("calories_consumed", 0),
+                calories_burned=row.get("calories_burned", 0),
+                workout_count=row.get("workout_count", 0),
+                water_goal=user.water_goal or 0,
+                calorie_goal=user.calorie_goal or 0
+            ))
 
-        return DailyProgressResponse(
-            water_consumed=water_consumed,
-            water_target=user.water_goal,
-            calories_consumed=calories_consumed,
-            calories_target=user.calorie_goal,
-            calories_burned=calories_burned,
-            calories_remaining=calories_remaining,
-            workout_count=workout_count
+        return WeeklyStats(
+            start_date=datetime.combine(start_date, time.min),
+            end_date=datetime.combine(end_date, time.min),
+            daily_stats=daily_stats
         )
@@ -1,19 +1,25 @@
 from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.crud import CRUDWater
-from app.db.database import get_session
+from app.db.models import WaterLog as WaterLogModel
+from app.db.stats import get_daily_stats
+from app.db.writer import LogWriter
 from app.schemas.water import WaterLog
-from app.services.profile_service import ProfileService
 from app.utils.exceptions import ValidationError
 
 
 class WaterService:
-    def __init__(self):
-        self.profile_service = ProfileService()
-
-    async def _get_crud(self) -> CRUDWater:
-        session = await get_session()
-        return CRUDWater(session)
+    def __init__(
+        self,
+        session: AsyncSession,
+        log_writer: Optional[LogWriter] = None
+    ):
+        self.session = session
+        self.crud = CRUDWater(session)
+        self.log_writer = log_writer
 
     def validate_amount(self, amount: int) -> None:
         """Валидация количества воды"""
@@ -28,8 +34,17 @@ class WaterService:
         try:
             self.validate_amount(amount)
 
-            crud = await self._get_crud()
-            water_log = await crud.create_water_log(
+            if self.log_writer is not None:
+                return await self.log_writer.add(
+                    WaterLogModel(
+                        user_id=user_id,
+                        amount=amount,
+                        timestamp=datetime.now()
+                    ),
+                    water_consumed=amount
+                )
+
+            water_log = await self.crud.create_water_log(
                 user_id=user_id,
                 amount=amount,
                 timestamp=datetime.now()
@@ -40,15 +55,15 @@ class WaterService:
             raise Exception(f"Error logging water: {str(e)}")
 
     async def get_daily_progress(self, user_id: int) -> tuple[float, float]:
-        """Получение прогресса за день"""
+        """
+        Получение прогресса за день из счетчиков daily_progress
+        Возвращает (выпито, сохраненная норма воды)
+        """
         try:
-            profile = await self.profile_service.get_profile(user_id)
-            if not profile:
+            stats = await get_daily_stats(self.session, user_id)
+            if not stats:
                 raise Exception("Profile not found")
 
-            crud = await self._get_crud()
-            consumed = await crud.get_daily_water_amount(user_id)
-
-            return consumed, profile.water_goal
+            return stats.water_consumed, stats.water_goal or 0
         except Exception as e:
             raise Exception(f"Error getting water progress: {str(e)}")
@@ -1,14 +1,24 @@
-from datetime import datetime, time
-from sqlalchemy import select, func, and_
+from datetime import datetime
+from typing import Optional
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.models import WorkoutLog, User, FoodLog
+from app.db.crud import CRUDProfile
+from app.db.models import WorkoutLog
+from app.db.stats import get_daily_stats
+from app.db.writer import LogWriter
 from app.schemas.workout import WorkoutCreate, DailyProgress
+from app.utils.dates import day_range
 from app.utils.exceptions import ValidationError
 
 
 class WorkoutService:
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self,
+        session: AsyncSession,
+        log_writer: Optional[LogWriter] = None
+    ):
         self.session = session
+        self.log_writer = log_writer
 
     def calculate_calories_burned(
         self,
@@ -31,10 +41,9 @@ class WorkoutService:
     async def log_workout(self, workout_data: WorkoutCreate) -> WorkoutLog:
         """Логирование тренировки"""
         try:
-            user = await self.session.execute(
-                select(User).where(User.user_id == workout_data.user_id)
+            user = await CRUDProfile(self.session).get_user(
+                workout_data.user_id
             )
-            user = user.scalar_one_or_none()
 
             if not user:
                 raise ValidationError("Пользователь не найден")
@@ -47,73 +56,47 @@ class WorkoutService:
                 calories_burned=workout_data.calories_burned,
                 timestamp=datetime.utcnow()
             )
+            if self.log_writer is not None:
+                return await self.log_writer.add(
+                    workout_log,
+                    calories_burned=workout_data.calories_burned,
+                    workout_count=1
+                )
 
             self.session.add(workout_log)
-            await self.session.commit()
+            await CRUDProfile(self.session).increment_daily_progress(
+                workout_data.user_id,
+                workout_log.timestamp.date(),
+                calories_burned=workout_data.calories_burned,
+                workout_count=1
+            )
+            await self.session.flush()
             return workout_log
 
         except Exception as e:
-            await self.session.rollback()
             raise ValidationError(f"Ошибка при сохранении тренировки: {str(e)}")  # noqa E501
 
     async def get_daily_stats(self, user_id: int) -> DailyProgress:
         """Получение статистики за день"""
         try:
             today = datetime.now().date()
-            today_start = datetime.combine(today, time.min)
-            today_end = datetime.combine(today, time.max)
-
-            # Получаем сумму сожженных калорий за день
-            burned_result = await self.session.execute(
-                select(func.sum(WorkoutLog.calories_burned)).where(
-                    and_(
-                        WorkoutLog.user_id == user_id,
-                        WorkoutLog.timestamp >= today_start,
-                        WorkoutLog.timestamp <= today_end
-                    )
-                )
-            )
-            total_burned = burned_result.scalar() or 0
+            today_start, _ = day_range(today)
 
-            # Получаем количество тренировок
-            workout_count_result = await self.session.execute(
-                select(func.count(WorkoutLog.id)).where(
-                    and_(
-                        WorkoutLog.user_id == user_id,
-                        WorkoutLog.timestamp >= today_start,
-                        WorkoutLog.timestamp <= today_end
-                    )
-                )
-            )
-            workout_count = workout_count_result.scalar() or 0
-
-            # Получаем сумму потребленных калорий за день
-            consumed_result = await self.session.execute(
-                select(func.sum(FoodLog.calories)).where(
-                    and_(
-                        FoodLog.user_id == user_id,
-                        FoodLog.timestamp >= today_start,
-                        FoodLog.timestamp <= today_end
-                    )
-                )
-            )
-            calories_consumed = consumed_result.scalar() or 0
+            stats = await get_daily_stats(self.session, user_id, today)
+            if not stats:
+                raise ValidationError("Пользователь не найден")
 
-            # Получаем цель по калориям пользователя
-            user_result = await self.session.execute(
-                select(User.calorie_goal).where(User.user_id == user_id)
-            )
-            calorie_goal = user_result.scalar() or 2000
+            calorie_goal = stats.calorie_goal or 2000
 
             # Расчет оставшихся калорий
-            calories_remaining = calorie_goal - calories_consumed + total_burned  # noqa E501
+            calories_remaining = calorie_goal - stats.calories_consumed + stats.calories_burned  # noqa E501
 
             return DailyProgress(
                 date=today_start,
-                total_burned=total_burned,
-                calories_consumed=calories_consumed,
+                total_burned=stats.calories_burned,
+                calories_consumed=stats.calories_consumed,
                 calories_remaining=calories_remaining,
-                workout_count=workout_count
+                workout_count=stats.workout_count
             )
 
         except Exception as e:
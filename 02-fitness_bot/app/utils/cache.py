@@ -0,0 +1,116 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class TTLCache:
+    """
+    Асинхронный кэш значений с временем жизни.
+    Параллельные запросы одного ключа разделяют одну загрузку
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._values: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def get(self, key: Hashable) -> Any:
+        item = self._values.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._values[key]
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._values[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._values.pop(key, None)
+
+    def clear(self) -> None:
+        self._values.clear()
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader))
+            self._inflight[key] = task
+        # Отмена одного ожидающего не должна прерывать общую загрузку
+        return await asyncio.shield(task)
+
+    async def _load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        try:
+            value = await loader()
+            self.set(key, value)
+            return value
+        finally:
+            del self._inflight[key]
+
+
+class LRUCache:
+    """
+    Ограниченный по размеру кэш с вытеснением давно не читанных
+    записей и временем жизни. Считает попадания и промахи.
+    generation растет при каждом сбросе: загрузка, во время которой
+    он изменился, могла прочитать устаревшие данные
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._values: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, key: Hashable) -> Any:
+        item = self._values.get(key)
+        if item is None or item[0] <= time.monotonic():
+            self._values.pop(key, None)
+            self.misses += 1
+            return None
+
+        self._values.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._values[key] = (time.monotonic() + self.ttl, value)
+        self._values.move_to_end(key)
+        while len(self._values) > self.max_size:
+            self._values.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._values.pop(key, None)
+        self.generation += 1
+
+    def clear(self) -> None:
+        self._values.clear()
+        self.generation += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._values),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,22 @@
+from datetime import date, datetime, time, timedelta
+from typing import Tuple
+
+
+def day_range(target_date: date) -> Tuple[datetime, datetime]:
+    """
+    Полуоткрытый интервал [начало дня, начало следующего дня)
+    для sargable-фильтра по timestamp
+    """
+    return period_range(target_date, target_date)
+
+
+def period_range(start_date: date, end_date: date) -> Tuple[datetime, datetime]:  # noqa: E501
+    """Интервал с начала start_date до конца end_date включительно"""
+    start = datetime.combine(start_date, time.min)
+    end = datetime.combine(end_date, time.min) + timedelta(days=1)
+    return start, end
+
+
+def week_start(target_date: date) -> date:
+    """Понедельник недели, в которую входит дата"""
+    return target_date - timedelta(days=target_date.weekday())
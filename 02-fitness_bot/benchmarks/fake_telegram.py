@@ -0,0 +1,215 @@
+"""
+Локальный фейковый Telegram Bot API для тестов и бенчмарков.
+
+Отдает апдейты через getUpdates или доставляет их на вебхук
+(с заголовком секретного токена), принимает sendMessage и
+засекает время от отправки апдейта до ответа бота в тот же чат.
+
+Запуск отдельно: python -m benchmarks.fake_telegram [--port 8081]
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+
+TOKEN = "123456:ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghi"
+SECRET = "test-secret"
+
+BOT_USER = {
+    "id": 1,
+    "is_bot": True,
+    "first_name": "Fake",
+    "username": "fake_fitness_bot",
+}
+
+
+class FakeTelegram:
+    def __init__(self):
+        self.updates: List[Dict] = []
+        self.new_updates = asyncio.Event()
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(1)
+        self.webhook_url: Optional[str] = None
+        self.webhook_secret: Optional[str] = None
+        self.webhook_session: Optional[aiohttp.ClientSession] = None
+        self.webhook_ready = asyncio.Event()
+        self.polled = asyncio.Event()
+        self.replies: Dict[int, List[str]] = {}
+        self.waiters: Dict[int, asyncio.Future] = {}
+        self.methods = {
+            "getMe": self.get_me,
+            "getUpdates": self.get_updates,
+            "setWebhook": self.set_webhook,
+            "deleteWebhook": self.delete_webhook,
+            "sendMessage": self.send_message,
+        }
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/bot{token}/{method}", self.handle)
+        app.on_cleanup.append(self.close)
+        return app
+
+    async def close(self, app: web.Application = None) -> None:
+        if self.webhook_session is not None:
+            await self.webhook_session.close()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if request.content_type == "application/json":
+            params = await request.json()
+        else:
+            params = dict(await request.post())
+        method = self.methods.get(request.match_info["method"])
+        result = await method(params) if method else True
+        return web.json_response({"ok": True, "result": result})
+
+    async def get_me(self, params: Dict):
+        return BOT_USER
+
+    async def set_webhook(self, params: Dict):
+        self.webhook_url = params["url"]
+        self.webhook_secret = params.get("secret_token")
+        if self.webhook_session is None:
+            self.webhook_session = aiohttp.ClientSession()
+        self.webhook_ready.set()
+        return True
+
+    async def delete_webhook(self, params: Dict):
+        self.webhook_url = None
+        self.webhook_ready.clear()
+        return True
+
+    async def get_updates(self, params: Dict):
+        self.polled.set()
+        offset = int(params.get("offset") or 0)
+        timeout = float(params.get("timeout") or 0)
+        self.updates = [u for u in self.updates if u["update_id"] >= offset]
+        if not self.updates and timeout:
+            self.new_updates.clear()
+            try:
+                await asyncio.wait_for(self.new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.updates[:100]
+
+    async def send_message(self, params: Dict):
+        chat_id = int(params["chat_id"])
+        self.replies.setdefault(chat_id, []).append(params["text"])
+        waiter = self.waiters.pop(chat_id, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(time.perf_counter())
+        return {
+            "message_id": next(self.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            "text": params["text"],
+        }
+
+    async def wait_ready(self, mode: str, timeout: float = 30) -> None:
+        """
+        Ждет, пока бот начнет принимать апдейты: первый getUpdates или
+        setWebhook и ответ его сервера. setWebhook уходит из startup до
+        того, как сервер слушает порт, поэтому адрес опрашивается до
+        первого HTTP-ответа (любой статус)
+        """
+        async def webhook_listening():
+            await self.webhook_ready.wait()
+            while True:
+                try:
+                    async with self.webhook_session.get(self.webhook_url):
+                        return
+                except aiohttp.ClientConnectionError:
+                    await asyncio.sleep(0.05)
+
+        if mode == "webhook":
+            await asyncio.wait_for(webhook_listening(), timeout)
+        else:
+            await asyncio.wait_for(self.polled.wait(), timeout)
+
+    def make_update(self, user_id: int, text: str) -> Dict:
+        update_id = next(self.update_ids)
+        return {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": "U"},
+                "text": text,
+            },
+        }
+
+    async def push(self, update: Dict, secret: Optional[str] = None) -> int:
+        """
+        Доставка апдейта боту; для вебхука возвращает HTTP-статус ответа
+        """
+        if self.webhook_url is None:
+            self.updates.append(update)
+            self.new_updates.set()
+            return 200
+
+        headers = {}
+        secret = self.webhook_secret if secret is None else secret
+        if secret:
+            headers["X-Telegram-Bot-Api-Secret-Token"] = secret
+        async with self.webhook_session.post(
+            self.webhook_url, json=update, headers=headers
+        ) as response:
+            return response.status
+
+    async def round_trip(self, user_id: int, text: str) -> float:
+        """Секунды от отправки апдейта до первого ответа бота в этот чат"""
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters[user_id] = waiter
+        started = time.perf_counter()
+        await self.push(self.make_update(user_id, text))
+        return await waiter - started
+
+
+def bot_env(
+    mode: str,
+    workdir: str,
+    api_port: int,
+    webhook_port: int,
+    workers: int = 1,
+    secret: str = SECRET
+) -> Dict[str, str]:
+    """Окружение для python bot.py против фейкового API на api_port"""
+    return {
+        **os.environ,
+        "BOT_TOKEN": TOKEN,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{workdir}/bot.db",
+        "WEATHER_API_KEY": "fake",
+        "FOOD_BACKEND": "api",
+        "FSM_STORAGE_PATH": f"{workdir}/fsm.db",
+        "TELEGRAM_API_URL": f"http://127.0.0.1:{api_port}",
+        "BOT_MODE": mode,
+        "WEBHOOK_URL": f"http://127.0.0.1:{webhook_port}",
+        "WEBHOOK_HOST": "127.0.0.1",
+        "WEBHOOK_PORT": str(webhook_port),
+        "WEBHOOK_SECRET": secret,
+        "WORKERS": str(workers),
+        "METRICS_PORT": "0",
+    }
+
+
+async def serve(port: int) -> None:
+    runner = web.AppRunner(FakeTelegram().create_app())
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8081)
+    args = parser.parse_args()
+
+    asyncio.run(serve(args.port))
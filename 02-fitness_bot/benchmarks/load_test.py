@@ -0,0 +1,282 @@
+"""
+Нагрузочный прогон бота без Telegram и внешних API.
+
+Синтетические пользователи проходят настройку профиля, затем
+случайно логируют воду, еду, тренировки и смотрят прогресс.
+Апдейты подаются прямо в Dispatcher.feed_update с фейковой сессией
+Bot; OpenWeatherMap и OpenFoodFacts подменяются локальной заглушкой,
+база и FSM-хранилище — временные файлы SQLite. Апдейты одного
+пользователя идут по очереди, пользователи — параллельно.
+
+В конце печатается пропускная способность и p50/p95/p99 по шагам.
+
+Запуск: python -m benchmarks.load_test [--users 2000] [--actions 10]
+        [--concurrency 200] [--api-delay 20]
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import SendMessage, TelegramMethod
+from aiogram.types import Message, Update
+from aiohttp import web
+
+
+STUB_PORT = 8783
+TOKEN = "123456:ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghi"
+
+CITIES = ["Москва", "Санкт-Петербург", "Казань", "Новосибирск", "Сочи"]
+FOODS = ["банан", "яблоко", "гречка", "творог", "курица", "хлеб"]
+
+# Шаг сценария: (метка для отчета, текст сообщения)
+Step = Tuple[str, str]
+
+
+class FakeSession(BaseSession):
+    """Сессия Bot без сети: ответы бота только считаются"""
+
+    def __init__(self):
+        super().__init__()
+        self.sent = 0
+        self.errors = 0
+        self.message_ids = itertools.count(1)
+
+    async def make_request(
+        self,
+        bot: Bot,
+        method: TelegramMethod,
+        timeout: int = None
+    ):
+        if isinstance(method, SendMessage):
+            self.sent += 1
+            if method.text.startswith("❌"):
+                self.errors += 1
+            return Message.model_validate({
+                "message_id": next(self.message_ids),
+                "date": int(time.time()),
+                "chat": {"id": method.chat_id, "type": "private"},
+                "text": method.text,
+            }, context={"bot": bot})
+        return True
+
+    async def stream_content(self, *args, **kwargs):
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+def create_stub_app(delay: float) -> web.Application:
+    """Заглушка OpenWeatherMap и OpenFoodFacts с задержкой ответа"""
+
+    async def weather(request: web.Request) -> web.Response:
+        await asyncio.sleep(delay)
+        return web.json_response({"main": {"temp": random.uniform(-5, 30)}})  # noqa: E501
+
+    async def food(request: web.Request) -> web.Response:
+        await asyncio.sleep(delay)
+        name = request.query.get("search_terms", "продукт")
+        return web.json_response({"products": [
+            {
+                "product_name": f"{name} {index}",
+                "nutriments": {
+                    "energy-kcal_100g": 50 + 40 * index,
+                    "proteins_100g": 3.0,
+                    "fat_100g": 1.5,
+                    "carbohydrates_100g": 12.0,
+                },
+            }
+            for index in range(1, 4)
+        ]})
+
+    app = web.Application()
+    app.router.add_get("/weather", weather)
+    app.router.add_get("/food", food)
+    return app
+
+
+def configure(workdir: str) -> None:
+    """Настройки бота задаются до первого импорта config"""
+    os.environ.update({
+        "BOT_TOKEN": TOKEN,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{workdir}/load.db",
+        "WEATHER_API_KEY": "load-test",
+        "WEATHER_API_URL": f"http://127.0.0.1:{STUB_PORT}/weather",
+        "FOOD_API_URL": f"http://127.0.0.1:{STUB_PORT}/food",
+        "FOOD_BACKEND": "api",
+        "FSM_STORAGE_PATH": f"{workdir}/fsm.db",
+        "METRICS_PORT": "0",
+        "DB_ECHO": "false",
+        # Лимиты частоты не должны отбрасывать синтетический трафик
+        "THROTTLE_RATE": "1000000",
+        "THROTTLE_BURST": "1000000",
+        "THROTTLE_GLOBAL_RATE": "1000000",
+        "THROTTLE_GLOBAL_BURST": "1000000",
+        "THROTTLE_COMMANDS": "{}",
+    })
+
+
+def profile_flow(rng: random.Random) -> List[Step]:
+    return [
+        ("/set_profile", "/set_profile"),
+        ("profile: weight", str(rng.randint(50, 120))),
+        ("profile: height", str(rng.randint(150, 200))),
+        ("profile: age", str(rng.randint(18, 70))),
+        ("profile: activity", str(rng.randint(1, 4))),
+        ("profile: city", rng.choice(CITIES)),
+    ]
+
+
+def water_flow(rng: random.Random) -> List[Step]:
+    return [
+        ("/log_water", "/log_water"),
+        ("water: amount", str(rng.choice([150, 200, 250, 300, 500]))),
+    ]
+
+
+def food_flow(rng: random.Random) -> List[Step]:
+    return [
+        ("/log_food", "/log_food"),
+        ("food: name", rng.choice(FOODS)),
+        ("food: portion", str(rng.randint(50, 400))),
+    ]
+
+
+def workout_flow(rng: random.Random) -> List[Step]:
+    return [
+        ("/log_workout", "/log_workout"),
+        ("workout: type", str(rng.randint(1, 7))),
+        ("workout: duration", str(rng.randint(10, 90))),
+        ("workout: intensity", str(rng.randint(1, 3))),
+    ]
+
+
+# Доли сценариев после настройки профиля
+FLOWS = [
+    (water_flow, 40),
+    (food_flow, 25),
+    (workout_flow, 15),
+    (lambda rng: [("/check_progress", "/check_progress")], 15),
+    (lambda rng: [("/profile", "/profile")], 5),
+]
+
+
+def user_script(user_id: int, actions: int) -> List[Step]:
+    rng = random.Random(user_id)
+    steps = profile_flow(rng)
+    flows, weights = zip(*FLOWS)
+    for flow in rng.choices(flows, weights, k=actions):
+        steps.extend(flow(rng))
+    return steps
+
+
+def make_update(bot: Bot, update_id: int, user_id: int, text: str) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Load"},
+            "text": text,
+        },
+    }, context={"bot": bot})
+
+
+def report(
+    latencies: Dict[str, List[float]],
+    wall_time: float,
+    session: FakeSession
+) -> None:
+    total = sum(len(samples) for samples in latencies.values())
+    print(
+        f"{total} updates in {wall_time:.1f} s: "
+        f"{total / wall_time:.0f} updates/s, {session.sent} replies, "
+        f"{session.errors} error replies"
+    )
+    print(
+        f"{'step':<20}{'count':>8}{'p50 ms':>10}"
+        f"{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    )
+    for label, samples in sorted(latencies.items()):
+        samples.sort()
+        if len(samples) > 1:
+            cuts = statistics.quantiles(samples, n=100)
+            p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+        else:
+            p50 = p95 = p99 = samples[0]
+        print(
+            f"{label:<20}{len(samples):>8}{p50 * 1000:>10.1f}"
+            f"{p95 * 1000:>10.1f}{p99 * 1000:>10.1f}"
+            f"{samples[-1] * 1000:>10.1f}"
+        )
+
+
+async def run(args: argparse.Namespace) -> None:
+    from bot import create_dispatcher
+    from app.db.database import engine, init_db, writer_engine
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    stub = web.AppRunner(create_stub_app(args.api_delay / 1000))
+    await stub.setup()
+    await web.TCPSite(stub, "127.0.0.1", STUB_PORT).start()
+
+    await init_db()
+    session = FakeSession()
+    bot = Bot(TOKEN, session=session)
+    dp = await create_dispatcher()
+    await dp.emit_startup(bot=bot, dispatcher=dp)
+
+    update_ids = itertools.count(1)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def simulate(user_id: int) -> None:
+        async with limit:
+            for label, text in user_script(user_id, args.actions):
+                update = make_update(bot, next(update_ids), user_id, text)
+                started = time.perf_counter()
+                await dp.feed_update(bot, update)
+                latencies[label].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*[
+            simulate(user_id)
+            for user_id in range(1, args.users + 1)
+        ])
+        wall_time = time.perf_counter() - started
+    finally:
+        await dp.emit_shutdown(bot=bot, dispatcher=dp)
+        await engine.dispose()
+        await writer_engine.dispose()
+        await stub.cleanup()
+
+    report(latencies, wall_time, session)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--actions", type=int, default=10,
+                        help="flows per user after the profile setup")
+    parser.add_argument("--concurrency", type=int, default=200,
+                        help="users active at the same time")
+    parser.add_argument("--api-delay", type=float, default=20,
+                        help="stub API response delay, ms")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        configure(workdir)
+        asyncio.run(run(args))
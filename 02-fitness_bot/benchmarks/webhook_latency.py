@@ -0,0 +1,106 @@
+"""
+Сравнение задержки апдейт -> ответ в режимах polling и webhook.
+
+Бот запускается отдельным процессом (python bot.py) против локального
+фейкового Bot API. Для каждого режима меряются последовательные
+запросы и пачка одновременных запросов от разных пользователей;
+в режиме webhook дополнительно проверяется отказ без секретного токена.
+
+Запуск: python -m benchmarks.webhook_latency [--requests 200] [--burst 100]
+        [--workers 4]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+from benchmarks.fake_telegram import FakeTelegram, bot_env
+
+
+ROOT = Path(__file__).resolve().parent.parent
+API_PORT = 8781
+WEBHOOK_PORT = 8782
+
+
+def percentiles(samples) -> str:
+    samples = sorted(samples)
+    p = statistics.quantiles(samples, n=100)
+    return (
+        f"p50={p[49] * 1000:.1f}ms p95={p[94] * 1000:.1f}ms "
+        f"p99={p[98] * 1000:.1f}ms max={samples[-1] * 1000:.1f}ms"
+    )
+
+
+async def run_mode(
+    mode: str,
+    text: str,
+    requests: int,
+    burst: int,
+    workers: int = 1
+):
+    fake = FakeTelegram()
+    runner = web.AppRunner(fake.create_app())
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", API_PORT).start()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "bot.py",
+            cwd=ROOT,
+            env=bot_env(mode, workdir, API_PORT, WEBHOOK_PORT, workers),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            await fake.wait_ready(mode)
+
+            # Прогрев: соединения, кэши, первые запросы к БД
+            for user_id in range(1, 11):
+                await fake.round_trip(user_id, text)
+
+            sequential = [
+                await fake.round_trip(1000 + i % 50, text)
+                for i in range(requests)
+            ]
+            started = time.perf_counter()
+            concurrent = await asyncio.gather(*[
+                fake.round_trip(5000 + i, text) for i in range(burst)
+            ])
+            burst_time = time.perf_counter() - started
+
+            print(f"[{mode}] sequential x{requests}: {percentiles(sequential)}")  # noqa: E501
+            print(
+                f"[{mode}] burst x{burst}: {percentiles(concurrent)} "
+                f"total={burst_time * 1000:.0f}ms"
+            )
+
+            if mode == "webhook":
+                status = await fake.push(
+                    fake.make_update(9999, text), secret="wrong"
+                )
+                print(f"[{mode}] wrong secret token -> HTTP {status}")
+        finally:
+            process.terminate()
+            await process.wait()
+            await runner.cleanup()
+
+
+async def main(args):
+    for mode in ("polling", "webhook"):
+        await run_mode(
+            mode, args.text, args.requests, args.burst, args.workers
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--burst", type=int, default=100)
+    parser.add_argument("--text", default="/start")
+    parser.add_argument("--workers", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -1,25 +1,151 @@
 import asyncio
 import logging
+import signal
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.webhook.aiohttp_server import (
+    SimpleRequestHandler,
+    setup_application,
+)
+from aiohttp import web
 
 from config import settings
 from app.bot.handlers import register_handlers
 from app.bot.middlewares import setup_middlewares
-from app.db.database import init_db
+from app.bot.middlewares.session_middleware import CommitBeforeReplyMiddleware
+from app.bot.sharding import create_front_dispatcher
+from app.bot.storage import SQLiteStorage
+from app.db.database import init_db, writer_session_maker
+from app.db.writer import LogWriter
+from app.integrations.food_api import FoodAPI
+from app.integrations.food_catalog import FoodCatalog
+from app.integrations.http import create_http_session
+from app.utils.metrics import start_metrics_server
 
 
 logging.basicConfig(level=logging.INFO)
 
 
-async def main():
-    await init_db()
-    bot = Bot(token=settings.BOT_TOKEN)
-    dp = Dispatcher()
+async def on_startup(dispatcher: Dispatcher, bot: Bot):
+    bot.session.middleware(CommitBeforeReplyMiddleware())
+
+    log_writer = LogWriter(writer_session_maker)
+    await log_writer.start()
+    dispatcher["log_writer"] = log_writer
+
+    http_session = create_http_session()
+    dispatcher["http_session"] = http_session
+    dispatcher["food_catalog"] = None
+    if settings.FOOD_BACKEND != "api":
+        food_api = None
+        if settings.FOOD_BACKEND == "catalog":
+            food_api = FoodAPI(http_session)
+        dispatcher["food_catalog"] = await FoodCatalog(
+            settings.FOOD_CATALOG_PATH,
+            food_api,
+            ttl=settings.FOOD_CATALOG_TTL,
+        ).open()
+
+    dispatcher["metrics_server"] = None
+    metrics_port = dispatcher.get("metrics_port", settings.METRICS_PORT)
+    if metrics_port:
+        dispatcher["metrics_server"] = await start_metrics_server(
+            settings.METRICS_HOST,
+            metrics_port
+        )
+
+
+async def on_shutdown(dispatcher: Dispatcher):
+    if dispatcher["metrics_server"] is not None:
+        await dispatcher["metrics_server"].cleanup()
+    await dispatcher["log_writer"].stop()
+    if dispatcher["food_catalog"] is not None:
+        await dispatcher["food_catalog"].close()
+    await dispatcher["http_session"].close()
+
+
+async def on_webhook_startup(bot: Bot):
+    await bot.set_webhook(
+        f"{settings.WEBHOOK_URL}{settings.WEBHOOK_PATH}",
+        secret_token=settings.WEBHOOK_SECRET,
+        drop_pending_updates=False,
+    )
+
+
+def create_bot() -> Bot:
+    session = None
+    if settings.TELEGRAM_API_URL:
+        session = AiohttpSession(
+            api=TelegramAPIServer.from_base(settings.TELEGRAM_API_URL)
+        )
+    return Bot(token=settings.BOT_TOKEN, session=session)
+
+
+async def create_dispatcher() -> Dispatcher:
+    storage = await SQLiteStorage(
+        settings.FSM_STORAGE_PATH,
+        ttl=settings.FSM_STATE_TTL,
+    ).open()
+    dp = Dispatcher(storage=storage)
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
     setup_middlewares(dp)
     register_handlers(dp)
+    return dp
+
+
+async def run_polling(dp: Dispatcher, bot: Bot):
     await bot.delete_webhook()
     await dp.start_polling(bot)
 
 
+async def run_webhook(dp: Dispatcher, bot: Bot):
+    """
+    Прием апдейтов через встроенный aiohttp-сервер. Telegram ждет
+    только подтверждения приема: апдейт обрабатывается в фоне,
+    запросы без верного секретного токена отклоняются с 401
+    (без WEBHOOK_SECRET настройки не проходят проверку)
+    """
+    dp.startup.register(on_webhook_startup)
+
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        handle_in_background=True,
+        secret_token=settings.WEBHOOK_SECRET,
+    ).register(app, path=settings.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, settings.WEBHOOK_HOST, settings.WEBHOOK_PORT)
+    await site.start()
+
+    # Остановка по SIGTERM/SIGINT, чтобы отработали shutdown-хуки
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        await runner.cleanup()
+
+
+async def main():
+    await init_db()
+    bot = create_bot()
+    if settings.WORKERS > 1:
+        dp = create_front_dispatcher(settings.WORKERS)
+    else:
+        dp = await create_dispatcher()
+    if settings.BOT_MODE == "webhook":
+        await run_webhook(dp, bot)
+    else:
+        await run_polling(dp, bot)
+
+
 if __name__ == "__main__":
     asyncio.run(main())
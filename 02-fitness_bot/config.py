@@ -1,3 +1,7 @@
+import re
+from typing import Dict, Literal, Tuple
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -5,6 +9,72 @@ class Settings(BaseSettings):
     BOT_TOKEN: str
     DATABASE_URL: str
     WEATHER_API_KEY: str
+    # Печать всех SQL-запросов, только для отладки
+    DB_ECHO: bool = False
+    # Ожидание блокировки записи SQLite, секунды
+    DB_BUSY_TIMEOUT: float = 30.0
+    # Предупреждение, если апдейт делает больше запросов или повторяет
+    # один запрос столько раз (N+1)
+    DB_QUERY_BUDGET: int = 10
+    DB_REPEAT_THRESHOLD: int = 3
+    WEATHER_CACHE_TTL: int = 1800
+    WEATHER_API_URL: str = "http://api.openweathermap.org/data/2.5/weather"
+    FOOD_API_URL: str = "https://world.openfoodfacts.org/cgi/search.pl"
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: int = 300
+    # Статистика закрытых недель для /weekly_stats и /monthly_stats
+    STATS_CACHE_SIZE: int = 10000
+    STATS_CACHE_TTL: int = 24 * 3600
+    # api — только OpenFoodFacts, catalog — каталог с API при промахе,
+    # offline — только каталог (импорт: app.integrations.food_import)
+    FOOD_BACKEND: Literal["api", "catalog", "offline"] = "catalog"
+    FOOD_CATALOG_PATH: str = "food_catalog.db"
+    FOOD_CATALOG_TTL: int = 7 * 24 * 3600
+    FSM_STORAGE_PATH: str = "fsm.db"
+    FSM_STATE_TTL: int = 24 * 3600
+    BOT_MODE: Literal["polling", "webhook"] = "polling"
+    # В режиме webhook обязательны URL и секретный токен
+    # (1-256 символов A-Z, a-z, 0-9, _ и -)
+    WEBHOOK_URL: str = ""
+    WEBHOOK_PATH: str = "/webhook"
+    WEBHOOK_SECRET: str = ""
+    WEBHOOK_HOST: str = "0.0.0.0"
+    WEBHOOK_PORT: int = 8080
+    # Свой Bot API сервер (локальный или тестовый), по умолчанию Telegram
+    TELEGRAM_API_URL: str = ""
+    # Больше 1 — апдейты раздаются процессам-обработчикам по user_id
+    WORKERS: int = 1
+    # Апдейтов в обработке у одного воркера, остальные ждут в очереди
+    WORKER_MAX_IN_FLIGHT: int = 200
+    # /metrics для Prometheus; 0 — выключено. Воркеры при WORKERS > 1
+    # слушают следующие порты: METRICS_PORT + 1 + номер воркера
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: int = 0
+    # Лимиты сообщений: запросов в секунду и допустимый всплеск
+    THROTTLE_RATE: float = 1.0
+    THROTTLE_BURST: int = 5
+    # Общий лимит на весь бот; при WORKERS > 1 делится поровну между
+    # воркерами, у каждого из которых свое ведро
+    THROTTLE_GLOBAL_RATE: float = 200.0
+    THROTTLE_GLOBAL_BURST: int = 400
+    # Отдельные лимиты команд: {"команда": [rate, burst]}
+    THROTTLE_COMMANDS: Dict[str, Tuple[float, int]] = {
+        "check_progress": (0.2, 3),
+        "log_food": (0.5, 3),
+    }
+
+    @model_validator(mode="after")
+    def check_webhook(self) -> "Settings":
+        if self.BOT_MODE != "webhook":
+            return self
+        if not self.WEBHOOK_URL:
+            raise ValueError("WEBHOOK_URL is required in webhook mode")
+        if not re.fullmatch(r"[A-Za-z0-9_-]{1,256}", self.WEBHOOK_SECRET):
+            raise ValueError(
+                "WEBHOOK_SECRET is required in webhook mode: "
+                "1-256 characters A-Z, a-z, 0-9, _ and -"
+            )
+        return self
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,13 @@
+import os
+import tempfile
+
+# Settings читаются при импорте config: окружение задается до импорта
+# модулей приложения, база и хранилища — во временном каталоге
+WORKDIR = tempfile.mkdtemp(prefix="fitness_bot_tests_")
+
+os.environ.setdefault("BOT_TOKEN", "123456:ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghi")  # noqa: E501
+os.environ.setdefault("WEATHER_API_KEY", "test")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{WORKDIR}/app.db")  # noqa: E501
+os.environ.setdefault("FSM_STORAGE_PATH", f"{WORKDIR}/fsm.db")
+os.environ.setdefault("FOOD_CATALOG_PATH", f"{WORKDIR}/food_catalog.db")
+os.environ.setdefault("FOOD_BACKEND", "api")
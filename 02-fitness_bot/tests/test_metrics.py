@@ -0,0 +1,59 @@
+import asyncio
+from datetime import datetime
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Chat, Message, Update, User
+
+from app.bot.middlewares.metrics_middleware import (
+    HANDLER_ERRORS,
+    HandlerMetricsMiddleware,
+    record_handler_error,
+)
+
+
+def make_update(text: str) -> Update:
+    return Update(
+        update_id=1,
+        message=Message(
+            message_id=1,
+            date=datetime.now(),
+            chat=Chat(id=1, type="private"),
+            from_user=User(id=1, is_bot=False, first_name="Test"),
+            text=text,
+        ),
+    )
+
+
+def test_caught_handler_errors_are_counted():
+    router = Router()
+
+    @router.message()
+    async def failing_handler(message: Message):
+        # Как хендлеры бота: ошибка ловится и пользователю уходит ответ
+        try:
+            raise RuntimeError("boom")
+        except Exception as e:
+            record_handler_error(e)
+
+    dp = Dispatcher()
+    dp.message.middleware(HandlerMetricsMiddleware())
+    dp.include_router(router)
+
+    key = ("test_metrics", "failing_handler", "RuntimeError")
+    before = HANDLER_ERRORS.values.get(key, 0)
+
+    async def run():
+        bot = Bot("123456:ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghi")
+        try:
+            await dp.feed_update(bot, make_update("hi"))
+        finally:
+            await bot.session.close()
+
+    asyncio.run(run())
+    assert HANDLER_ERRORS.values.get(key, 0) == before + 1
+
+
+def test_errors_outside_handlers_are_ignored():
+    before = dict(HANDLER_ERRORS.values)
+    record_handler_error(RuntimeError("boom"))
+    assert HANDLER_ERRORS.values == before
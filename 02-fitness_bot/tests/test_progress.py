@@ -0,0 +1,78 @@
+import asyncio
+from datetime import date, datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.database import Base
+from app.db.models import FoodLog, User
+from app.services import progress_service
+from app.services.progress_service import ProgressService, closed_weeks_cache
+
+USER_ID = 5001
+SUNDAY = date(2026, 10, 18)
+
+
+def fake_today(day):
+    class FakeDate(date):
+        @classmethod
+        def today(cls):
+            return day
+    return FakeDate
+
+
+def food(calories, timestamp):
+    return FoodLog(
+        user_id=USER_ID,
+        timestamp=timestamp,
+        food_name="test",
+        calories=calories,
+    )
+
+
+def sunday_calories(stats):
+    [day] = [
+        day for day in stats.daily_stats if day.date.date() == SUNDAY
+    ]
+    return day.calories_consumed
+
+
+def test_week_is_cached_only_a_day_after_it_ends(tmp_path, monkeypatch):
+    closed_weeks_cache.clear()
+    week = (USER_ID, date(2026, 10, 12))
+
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'progress.db'}")  # noqa: E501
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            session.add(User(
+                user_id=USER_ID, weight=70, height=175, age=30,
+                activity_level=1, city="Moscow",
+                calorie_goal=2000, water_goal=2000,
+            ))
+            session.add(food(500, datetime(2026, 10, 18, 12, 0)))
+            await session.commit()
+
+            # Понедельник: прошлая неделя еще открыта
+            monkeypatch.setattr(progress_service, "date", fake_today(date(2026, 10, 19)))  # noqa: E501
+            service = ProgressService(session)
+            assert sunday_calories(await service.get_period_stats(USER_ID, 7)) == 500  # noqa: E501
+            assert closed_weeks_cache.get(week) is None
+
+            # Утро понедельника по местному времени, а по utcnow воскресенье
+            session.add(food(200, datetime(2026, 10, 18, 23, 30)))
+            await session.commit()
+            assert sunday_calories(await service.get_period_stats(USER_ID, 7)) == 700  # noqa: E501
+
+            # Со вторника неделя закрыта и берется из кэша
+            monkeypatch.setattr(progress_service, "date", fake_today(date(2026, 10, 20)))  # noqa: E501
+            assert sunday_calories(await service.get_period_stats(USER_ID, 7)) == 700  # noqa: E501
+            assert closed_weeks_cache.get(week) is not None
+
+        await engine.dispose()
+
+    try:
+        asyncio.run(run())
+    finally:
+        closed_weeks_cache.clear()
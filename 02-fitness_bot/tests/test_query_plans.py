@@ -0,0 +1,76 @@
+import asyncio
+from datetime import date
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.crud import CRUDProfile
+from app.db.database import Base
+from app.db.stats import daily_stats_query
+
+
+def explain_queries(path, call):
+    """
+    Выполняет call(session) на пустой схеме SQLite и возвращает
+    EXPLAIN QUERY PLAN каждого SELECT, который он отправил в базу
+    """
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):  # noqa: E501
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append((statement, parameters))
+
+        event.listen(engine.sync_engine, "before_cursor_execute", record)
+        try:
+            async with AsyncSession(engine) as session:
+                await call(session)
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+        plans = []
+        async with engine.connect() as conn:
+            for statement, parameters in statements:
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN QUERY PLAN {statement}", parameters
+                )
+                plans.append(" | ".join(row.detail for row in result))
+        await engine.dispose()
+        return plans
+
+    return asyncio.run(run())
+
+
+def test_daily_stats_use_user_and_progress_indexes(tmp_path):
+    async def call(session):
+        await session.execute(daily_stats_query(1, date.today()))
+
+    [plan] = explain_queries(tmp_path / "plans.db", call)
+    assert "SCAN" not in plan
+    assert "SEARCH users USING INDEX" in plan
+    assert "(user_id=?)" in plan
+    assert "SEARCH daily_progress USING INDEX" in plan
+    assert "(user_id=? AND date=?)" in plan
+
+
+def test_user_lookup_uses_user_id_index(tmp_path):
+    async def call(session):
+        await CRUDProfile(session).load_user(1)
+
+    [plan] = explain_queries(tmp_path / "plans.db", call)
+    assert plan.startswith("SEARCH users USING INDEX")
+    assert plan.endswith("(user_id=?)")
+
+
+def test_period_totals_use_covering_indexes(tmp_path):
+    async def call(session):
+        today = date.today()
+        await CRUDProfile(session).get_weekly_logs(1, today, today)
+
+    [plan] = explain_queries(tmp_path / "plans.db", call)
+    for table in ("water_logs", "food_logs", "workout_logs"):
+        assert f"USING COVERING INDEX ix_{table}_user_id_timestamp" in plan
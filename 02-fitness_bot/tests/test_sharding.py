@@ -0,0 +1,91 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import queue
+
+from aiogram.types import Update
+
+from app.bot.sharding import WorkerPool
+
+
+TIMEOUT = 30
+CRASH_KEY = 6
+
+
+def recording_worker(results, crashed, index, jobs, acked):
+    """
+    Вместо бота: записывает (воркер, номер, ключ) и подтверждает номер.
+    На CRASH_KEY первый раз падает, не подтвердив его
+    """
+    while True:
+        item = jobs.get()
+        if item is None:
+            break
+        sequence, key, _ = item
+        if key == CRASH_KEY and not crashed.is_set():
+            crashed.set()
+            # Записанное до падения должно дойти до теста
+            results.close()
+            results.join_thread()
+            os._exit(1)
+        results.put((index, sequence, key))
+        acked.value = sequence
+
+
+async def collect(results, count):
+    loop = asyncio.get_running_loop()
+    items = []
+    while len(items) < count:
+        try:
+            items.append(
+                await loop.run_in_executor(None, results.get, True, TIMEOUT)
+            )
+        except queue.Empty:
+            break
+    return items
+
+
+def run_pool(keys, expected):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    crashed = context.Event()
+
+    async def run():
+        pool = WorkerPool(
+            2, target=functools.partial(recording_worker, results, crashed)
+        )
+        await pool.start()
+        try:
+            for update_id, key in enumerate(keys, start=1):
+                pool.route(key, Update(update_id=update_id))
+            return pool, await collect(results, expected)
+        finally:
+            await pool.stop()
+
+    return asyncio.run(run())
+
+
+def test_updates_are_routed_by_key_in_order():
+    keys = [1, 2, 3, 4, 5, 7, 9]
+    pool, items = run_pool(keys, len(keys))
+
+    assert sorted(key for _, _, key in items) == sorted(keys)
+    for index, _, key in items:
+        assert index == key % 2
+    for index in range(2):
+        sequences = [sequence for i, sequence, _ in items if i == index]
+        assert sequences == list(range(1, len(sequences) + 1))
+    assert pool.restarts == 0
+
+
+def test_dead_worker_updates_are_redelivered():
+    # Воркер 0 обрабатывает 2 и 4, падает на 6; 6 и 8 доставляются
+    # заново перезапущенному процессу
+    keys = [2, 4, CRASH_KEY, 8, 1]
+    pool, items = run_pool(keys, len(keys))
+
+    assert sorted(key for _, _, key in items) == sorted(keys)
+    assert pool.restarts == 1
+    assert pool.redelivered == 2
+    assert [key for index, _, key in items if index == 0] == [2, 4, 6, 8]
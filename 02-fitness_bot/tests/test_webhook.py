@@ -0,0 +1,95 @@
+import asyncio
+import socket
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from aiohttp import web
+
+from benchmarks.fake_telegram import SECRET, FakeTelegram, bot_env
+
+
+ROOT = Path(__file__).resolve().parent.parent
+TIMEOUT = 30
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def running_bot(mode: str, workdir: Path):
+    """Фейковый Bot API и python bot.py против него"""
+    fake = FakeTelegram()
+    api_port, webhook_port = free_port(), free_port()
+    runner = web.AppRunner(fake.create_app())
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", api_port).start()
+
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "bot.py",
+        cwd=ROOT,
+        env=bot_env(mode, str(workdir), api_port, webhook_port),
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        await fake.wait_ready(mode, TIMEOUT)
+        yield fake
+    finally:
+        process.terminate()
+        await process.wait()
+        await runner.cleanup()
+
+
+async def reply_to(fake: FakeTelegram, user_id: int, text: str) -> str:
+    await asyncio.wait_for(fake.round_trip(user_id, text), TIMEOUT)
+    return fake.replies[user_id][0]
+
+
+def test_webhook_replies_and_rejects_bad_secret(tmp_path):
+    async def run():
+        async with running_bot("webhook", tmp_path) as fake:
+            assert fake.webhook_secret == SECRET
+            assert (await reply_to(fake, 1, "/start")).startswith("Привет!")
+
+            wrong = await fake.push(fake.make_update(2, "/start"), secret="wrong")  # noqa: E501
+            missing = await fake.push(fake.make_update(3, "/start"), secret="")  # noqa: E501
+            assert wrong == 401
+            assert missing == 401
+
+            # Отклоненные апдейты не обработаны: ответ следующему
+            # пользователю приходит, а им — нет
+            assert "/help" in await reply_to(fake, 4, "/help")
+            assert 2 not in fake.replies
+            assert 3 not in fake.replies
+
+    asyncio.run(run())
+
+
+def test_polling_replies(tmp_path):
+    async def run():
+        async with running_bot("polling", tmp_path) as fake:
+            assert fake.webhook_url is None
+            assert (await reply_to(fake, 1, "/start")).startswith("Привет!")
+
+    asyncio.run(run())
+
+
+def test_webhook_mode_requires_secret(tmp_path):
+    async def run():
+        env = bot_env("webhook", str(tmp_path), free_port(), free_port(), secret="")  # noqa: E501
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "bot.py",
+            cwd=ROOT,
+            env=env,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await asyncio.wait_for(process.communicate(), TIMEOUT)
+        assert process.returncode != 0
+        assert b"WEBHOOK_SECRET is required" in stderr
+
+    asyncio.run(run())